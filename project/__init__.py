@@ -0,0 +1,2 @@
+# Register the connection_created hook before any connection is opened
+from . import db  # noqa: F401
@@ -0,0 +1,33 @@
+"""
+Per-connection database tuning, applied through the connection_created signal.
+
+SQLite defaults to a rollback journal where a writer blocks every reader and
+a second writer fails fast with "database is locked". WAL lets readers run
+alongside the single writer, synchronous=NORMAL drops the fsync per commit
+(still durable across application crashes), and busy_timeout makes writers
+queue for the lock instead of erroring.
+"""
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def apply_sqlite_pragmas(cursor, busy_timeout_ms):
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+
+
+@receiver(connection_created)
+def tune_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    timeout = connection.settings_dict.get("OPTIONS", {}).get("timeout", 20)
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, timeout * 1000)
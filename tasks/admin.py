@@ -1,13 +1,32 @@
-from django.contrib import admin
-from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
 from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, PAGE_VAR, SEARCH_VAR
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from django.utils import timezone
-from .models import Task
+from users.cache import get_department_choices, get_first_names
+from .analytics import department_report
+from .cache import get_department_status_counts, invalidate_status_counts
+from .forms import TaskImportForm
+from .history import Transition, record_task_change, record_transitions
+from .importers import TaskImporter, read_task_file
+from .mail import queue_assignment_emails
+from .pagination import CountedPaginator
+from .search import search_tasks
+from .transitions import MANAGER, actor_for, check_transitions, sources
+from .models import NotificationLog, OutboundEmail, ReminderRun, Task, TaskStatusEvent
 from django import forms
 
 User = get_user_model()
 
+# Suggestions returned per keystroke by the assignee filter
+NAME_SUGGESTIONS = 20
+
 
 # 👇 Custom ModelForm for Task change page
 # This handles field-level restrictions (disabled fields) based on the current user
@@ -35,6 +54,54 @@ class TaskChangeForm(forms.ModelForm):
         ):
             self.fields["priority"].disabled = True
 
+    # STATUS rule: only moves listed in Task.TRANSITIONS
+    def clean(self):
+        cleaned_data = super().clean()
+        status = cleaned_data.get("status")
+        if self.instance.pk and self.current_user and status and "status" in self.changed_data:
+            errors = check_transitions(actor_for(self.current_user), [(None, self.initial["status"], status)])
+            if errors:
+                self.add_error("status", errors[None])
+        return cleaned_data
+
+
+# 👇 Department filter with choices from the shared cache (dropped on Department save/delete)
+# instead of a DISTINCT query over departments on every changelist render
+class DepartmentFilter(admin.SimpleListFilter):
+    title = "department"
+    parameter_name = "department"
+
+    def lookups(self, request, model_admin):
+        choices = get_department_choices()
+        # Managers only ever see their own department's tasks
+        if not (request.user.is_superuser or request.user.role == User.Role.ADMIN):
+            choices = [(pk, name) for pk, name in choices if pk == request.user.department_id]
+        return choices
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(assigned_to__department_id=self.value())
+        return queryset
+
+
+# 👇 Assignee filter as a text input; matching names are fetched as the user types
+# (TaskAdmin.assignee_names_view) instead of listing every distinct first name
+class AssigneeNameFilter(admin.SimpleListFilter):
+    title = "assignee"
+    parameter_name = "assignee"
+    template = "admin/tasks/task/assignee_filter.html"
+
+    def lookups(self, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().strip():
+            return queryset.filter(assigned_to__first_name=self.value().strip())
+        return queryset
+
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
@@ -52,26 +119,44 @@ class TaskAdmin(admin.ModelAdmin):
     )
 
     # Filters available in the sidebar
-    list_filter = ("assigned_to__department", "assigned_to__first_name",)
+    list_filter = (DepartmentFilter, AssigneeNameFilter)
     # Fields editable directly in the list view
     list_editable = ("priority", "status") 
-    # Fields searchable via the search box
-    # search_fields = ("title", "description", "assigned_to__username", "assigned_to__first_name")
+    # Fields searchable via the search box (served by the full-text index, see get_search_results)
+    search_fields = ("title", "description", "assigned_to__username", "assigned_to__first_name")
+    # Counts come from get_paginator; skip the extra unfiltered COUNT(*) on filtered pages
+    show_full_result_count = False
     # Exclude assigned_by from default forms (will be set automatically)
     exclude = ('assigned_by',)
     # Use custom form for the change page
     form = TaskChangeForm
 
-    # 👇 Optional: autocomplete for foreign keys (commented out here)
-    # autocomplete_fields = ["assigned_to"]
+    # Bulk status transitions, each a single UPDATE
+    actions = ["approve_review", "block_tasks", "reopen_tasks"]
+
+    # 👇 Assignee picker loads matches from the admin autocomplete JSON endpoint,
+    # paginated and scoped by CustomUserAdmin.get_queryset, instead of rendering every user
+    autocomplete_fields = ["assigned_to"]
 
     # Custom display for Department in list view
     @admin.display(description="Department", ordering="assigned_to__department")
     def get_department(self, obj):
         return obj.assigned_to.department
 
-    # Save method: sets assigned_by automatically, updates fields, and sends emails
+    # Hand the current user to TaskChangeForm for its PRIORITY/STATUS rules
+    def get_form(self, request, obj=None, **kwargs):
+        Form = super().get_form(request, obj, **kwargs)
+
+        class CurrentUserForm(Form):
+            def __init__(self, *args, **form_kwargs):
+                form_kwargs.setdefault("current_user", request.user)
+                super().__init__(*args, **form_kwargs)
+
+        return CurrentUserForm
+
+    # Save method: sets assigned_by automatically, updates fields, and queues emails
     def save_model(self, request, obj, form, change):
+        old = None
         if change:
             # Fetch the old object for comparison
             old = Task.objects.get(pk=obj.pk)
@@ -84,48 +169,141 @@ class TaskAdmin(admin.ModelAdmin):
                 and old.assigned_by.role == User.Role.ADMIN
             ):
                 obj.priority = old.priority
-            
+
+            # STATUS rule enforcement: the forms validate this, but never save a move
+            # Task.TRANSITIONS doesn't allow
+            if check_transitions(actor_for(request.user), [(obj.pk, old.status, obj.status)]):
+                obj.status = old.status
+
         # Automatically set assigned_by on creation
         if not obj.assigned_by:
             obj.assigned_by = request.user
 
         super().save_model(request, obj, form, change)
-        
-        # Send notification email if new task or reassigned
-        if not change or "assigned_to" in form.changed_data:
-            subject = f"New Task Assigned: {obj.title}"
-            message = (
-                f"Hello {obj.assigned_to.first_name},\n\n"
-                f"You have been assigned a new task: {obj.title}\n"
-                f"Priority: {obj.get_priority_display()}\n"
-                f"Deadline: {obj.deadline}\n\n"
-                f"Description:\n{obj.description}\n\n"
-                f"Link: http://task.dobltd.com \n\n"
-                f"Please log in to your dashboard to view details."
+        if old and old.status != obj.status:
+            record_task_change(obj, old.status)
+
+        # Send notification email if new task or reassigned (once per assignee per day)
+        if not change or ("assigned_to" in form.changed_data and not self.already_notified(obj)):
+            # Queued in the admin's transaction; send_queued_mail delivers it
+            queue_assignment_emails([obj])
+
+    def already_notified(self, obj):
+        return NotificationLog.objects.filter(
+            kind=NotificationLog.Kind.ASSIGNMENT,
+            day=timezone.localdate(),
+            task=obj,
+            recipient_id=obj.assigned_to_id,
+        ).exists()
+
+    # Move every selected task that Task.TRANSITIONS allows to `to_status` with one UPDATE
+    def transition(self, request, queryset, to_status):
+        from_statuses = sources(MANAGER, to_status)
+        eligible = queryset.filter(status__in=from_statuses)
+        # Same rule as get_readonly_fields: managers can't change status on Admin-assigned tasks
+        if request.user.role == User.Role.MANAGER:
+            eligible = eligible.exclude(assigned_by__role=User.Role.ADMIN)
+
+        with transaction.atomic():
+            # Read under the lock (like api.update_status) so the history matches what the UPDATE moves
+            rows = list(
+                Task.objects.filter(pk__in=eligible.values("pk"))
+                .select_for_update(of=("self",))
+                .values_list("id", "status", "assigned_to_id", "assigned_to__department_id")
             )
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [obj.assigned_to.email or obj.assigned_to.username],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                # Show warning in admin if email fails
-                self.message_user(request, f"Task saved but email failed: {e}", level="WARNING")
+            updated = Task.objects.filter(
+                pk__in=[row[0] for row in rows], status__in=from_statuses
+            ).update(status=to_status, status_updated_at=timezone.localdate())
+            record_transitions(
+                Transition(task_id, assignee_id, department_id, status, to_status)
+                for task_id, status, assignee_id, department_id in rows
+            )
+        # .update() skips post_save, so drop the sidebar counts here
+        invalidate_status_counts(*{row[2] for row in rows})
+
+        skipped = queryset.count() - updated
+        label = Task.Status(to_status).label
+        self.message_user(
+            request,
+            f"{updated} task(s) moved to {label}."
+            + (f" {skipped} skipped (wrong status or locked by an Admin assignment)." if skipped else ""),
+            messages.SUCCESS if updated else messages.WARNING,
+        )
+
+    @admin.action(description="Approve review (Review → Completed)")
+    def approve_review(self, request, queryset):
+        self.transition(request, queryset, Task.Status.COMPLETED)
+
+    @admin.action(description="Block selected tasks")
+    def block_tasks(self, request, queryset):
+        self.transition(request, queryset, Task.Status.BLOCKED)
+
+    @admin.action(description="Move to In Progress (start or reopen)")
+    def reopen_tasks(self, request, queryset):
+        self.transition(request, queryset, Task.Status.IN_PROGRESS)
+
+    # Full-text search with prefix matching instead of icontains across the joins
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        results = search_tasks(queryset, search_term)
+        # Best matches first, unless a column sort was picked
+        if ORDER_VAR not in request.GET:
+            results = results.order_by("search_rank", "-pk")
+        return results, False
+
+    # Page counts from the cached per-department/per-status totals instead of COUNT(*)
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return CountedPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            known_count=self.known_count(request),
+        )
+
+    # Total for the changelist when only the status/department filters are applied,
+    # or None to let the paginator count (search, assignee filter, ...)
+    def known_count(self, request):
+        # A per-process cache never hears about other workers' writes, and a wrong
+        # total breaks the changelist pagination, so let the paginator count
+        if not settings.SHARED_CACHE:
+            return None
+        # Blank inputs from the filter form don't filter anything
+        params = {name: value for name, value in request.GET.items() if value}
+        for name in (ORDER_VAR, PAGE_VAR, ALL_VAR):
+            params.pop(name, None)
+        if params.pop(SEARCH_VAR, "").strip():
+            return None
+        status = params.pop("status__exact", None)
+        department = params.pop("department", None)
+        if params or (status and status not in Task.Status.values) or (department and not department.isdigit()):
+            return None
+        department = int(department) if department else None
+
+        # Same scoping as get_queryset
+        if request.user.is_superuser or request.user.role == User.Role.ADMIN:
+            scope = None
+        elif request.user.role == User.Role.MANAGER and request.user.department_id:
+            scope = request.user.department_id
+        else:
+            return 0
+
+        return sum(
+            total
+            for (department_id, task_status), total in get_department_status_counts().items()
+            if (not status or task_status == status)
+            and (department is None or department_id == department)
+            and (scope is None or department_id == scope)
+        )
 
     # Limit queryset based on user role
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        # Admins see all tasks
-        if request.user.is_superuser or request.user.role == User.Role.ADMIN:
-            return qs
-        # Managers see only tasks assigned to their department
-        if request.user.role == User.Role.MANAGER and request.user.department:
-            return qs.filter(assigned_to__department=request.user.department)
-        # Others see nothing
-        return qs.none()
+        # Join everything list_display and the list_editable formset read per row
+        # (department column, assigned_to/assigned_by, assigned_by.role lock check)
+        qs = super().get_queryset(request).select_related(
+            "assigned_to__department",
+            "assigned_by",
+        )
+        # Admins see all tasks, managers their department's, others nothing
+        return qs.visible_to(request.user)
 
     # Limit foreign key choices in forms based on user role
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
@@ -135,8 +313,105 @@ class TaskAdmin(admin.ModelAdmin):
         # Managers see only users in their department
         if request.user.role == User.Role.MANAGER and request.user.department:
             if db_field.name == "assigned_to":
-                kwargs["queryset"] = User.objects.filter(department=request.user.department)
+                kwargs["queryset"] = request.user.visible_users()
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="tasks_task_import",
+            ),
+            path(
+                "analytics/",
+                self.admin_site.admin_view(self.analytics_view),
+                name="tasks_task_analytics",
+            ),
+            path(
+                "assignee-names/",
+                self.admin_site.admin_view(self.assignee_names_view),
+                name="tasks_task_assignee_names",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    # 👇 Department throughput/load page, served from the TaskRollup table (see tasks/analytics.py)
+    def analytics_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        departments = get_department_choices()
+        if request.user.is_superuser or request.user.role == User.Role.ADMIN:
+            department = request.GET.get("department", "")
+            department_id = int(department) if department.isdigit() else None
+        elif request.user.role == User.Role.MANAGER and request.user.department_id:
+            department_id = request.user.department_id
+            departments = [(pk, name) for pk, name in departments if pk == department_id]
+        else:
+            raise PermissionDenied
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Task analytics",
+            "departments": departments,
+            "department_id": department_id,
+            **department_report(department_id),
+        }
+        return TemplateResponse(request, "admin/tasks/task/analytics.html", context)
+
+    # JSON suggestions for AssigneeNameFilter, from the cached name list and scoped like get_queryset
+    def assignee_names_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        names_by_department = get_first_names()
+        if request.user.is_superuser or request.user.role == User.Role.ADMIN:
+            names = sorted({name for names in names_by_department.values() for name in names})
+        elif request.user.role == User.Role.MANAGER and request.user.department_id:
+            names = names_by_department.get(request.user.department_id, [])
+        else:
+            names = []
+
+        term = request.GET.get("term", "").strip().lower()
+        matches = [name for name in names if name.lower().startswith(term)]
+        return JsonResponse({"results": matches[:NAME_SUGGESTIONS]})
+
+    # 👇 Bulk task creation from a spreadsheet (see tasks/importers.py)
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        errors = []
+        form = TaskImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                importer = TaskImporter(request.user, request.user.visible_users())
+                report = importer.run(read_task_file(upload.file, upload.name))
+            except ValidationError as e:
+                form.add_error("file", e)
+            else:
+                errors = report.errors
+                self.message_user(
+                    request,
+                    f"Created {report.created} task(s); {len(errors)} row(s) skipped.",
+                    messages.WARNING if errors else messages.SUCCESS,
+                )
+                if not errors:
+                    return redirect("admin:tasks_task_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import tasks",
+            "help_text": "CSV, JSONL or Excel (.xlsx) with title, description, priority, deadline (YYYY-MM-DD), "
+                         "assigned_to (email or DOB ID) and an optional status.",
+            "form": form,
+            "errors": errors,
+        }
+        return TemplateResponse(request, "admin/import_form.html", context)
     
     # Make priority readonly in change form for Managers if assigned by Admin
     def get_readonly_fields(self, request, obj=None):
@@ -178,7 +453,69 @@ class TaskAdmin(admin.ModelAdmin):
 
                 return form
 
+            # STATUS rule for list_editable: validate every changed row in one call
+            def clean(self):
+                super().clean()
+                forms_by_index = dict(enumerate(self.forms))
+                changes = [
+                    (i, form.initial["status"], form.cleaned_data["status"])
+                    for i, form in forms_by_index.items()
+                    if form.instance.pk and "status" in form.changed_data and "status" in form.cleaned_data
+                ]
+                for i, message in check_transitions(actor_for(request.user), changes).items():
+                    forms_by_index[i].add_error("status", message)
+
         return PriorityLockedFormSet
-    
-    
-    
\ No newline at end of file
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "to", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = [f.name for f in OutboundEmail._meta.fields]
+    actions = ["requeue"]
+
+    def has_add_permission(self, request):
+        return False
+
+    # Give dead-lettered messages another round of attempts
+    @admin.action(description="Requeue selected emails")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.QUEUED, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated} email(s) requeued.")
+
+
+@admin.register(ReminderRun)
+class ReminderRunAdmin(admin.ModelAdmin):
+    list_display = ("day", "status", "tasks", "recipients", "sent", "failed", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = [f.name for f in ReminderRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(NotificationLog)
+class NotificationLogAdmin(admin.ModelAdmin):
+    list_display = ("day", "kind", "task", "recipient", "created_at")
+    list_filter = ("kind",)
+    list_select_related = ("task", "recipient")
+    date_hierarchy = "day"
+    readonly_fields = [f.name for f in NotificationLog._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(TaskStatusEvent)
+class TaskStatusEventAdmin(admin.ModelAdmin):
+    list_display = ("changed_at", "task", "from_status", "to_status", "department", "entered_at")
+    list_filter = ("to_status",)
+    list_select_related = ("task", "department")
+    date_hierarchy = "changed_at"
+    readonly_fields = [f.name for f in TaskStatusEvent._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,170 @@
+"""
+Daily task rollups for the TaskAdmin analytics page.
+
+rollup() writes TaskRollup rows. It reads the live Task table incrementally:
+- tasks completed since the last rollup, from the TaskStatusEvent history
+  (status_updated_at moves on every save, so it can't date a completion);
+- a snapshot of the open work, using deadline for the overdue counts and
+  the status history for how long each task has been in its status.
+department_report() then reads only TaskRollup and the TaskStatusEvent history.
+"""
+
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .history import average_time_in_status
+from .models import Task, TaskRollup, TaskStatusEvent
+
+# How far back the first rollup looks for completed tasks
+BACKFILL_DAYS = 90
+REPORT_DAYS = 30
+
+UNFINISHED_STATUSES = [status for status in Task.Status.values if status != Task.Status.COMPLETED]
+
+RollupReport = namedtuple("RollupReport", ["since", "completed_rows", "open_rows"])
+
+
+def completed_rows(since, until):
+    """COMPLETED rollups for each day in [since, until], from the completion events on it."""
+    start = timezone.make_aware(datetime.combine(since, time.min))
+    end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))
+    day = TruncDate("changed_at")
+    rows = (
+        TaskStatusEvent.objects.filter(
+            to_status=TaskStatusEvent.Status.COMPLETED,
+            changed_at__gte=start,
+            changed_at__lt=end,
+            assignee__isnull=False,
+        )
+        .order_by()
+        .annotate(day=day)
+        # Credited to whoever completed it; one row per (day, assignee) to match
+        # unique_task_rollup, with the department taken from the assignee like open_rows
+        .values_list("day", "assignee_id", "assignee__department_id")
+        # A task completed, reopened and completed again the same day counts once
+        .annotate(
+            total=Count("task", distinct=True),
+            late=Count("task", distinct=True, filter=Q(task__deadline__lt=day)),
+        )
+    )
+    return [
+        TaskRollup(
+            day=day, assignee_id=assignee_id, department_id=department_id,
+            status=Task.Status.COMPLETED, tasks=total, overdue=late,
+        )
+        for day, assignee_id, department_id, total, late in rows
+    ]
+
+
+def open_rows(day):
+    """Snapshot of every unfinished task on `day`, per assignee and status."""
+    # When each task entered its status: its last event, else the day it was created
+    # (status_updated_at moves on every save); same lookup as record_transitions
+    last_change = (
+        TaskStatusEvent.objects.filter(task=OuterRef("pk"))
+        .order_by("-changed_at")
+        .values("changed_at")[:1]
+    )
+    rows = (
+        Task.objects.filter(status__in=UNFINISHED_STATUSES)
+        .order_by()
+        .annotate(entered=Coalesce(TruncDate(Subquery(last_change)), "created_at"))
+        .values_list("assigned_to_id", "assigned_to__department_id", "status", "entered")
+        .annotate(total=Count("id"), late=Count("id", filter=Q(deadline__lt=day)))
+    )
+    rollups = {}
+    for assignee_id, department_id, status, entered, total, late in rows:
+        rollup = rollups.get((assignee_id, status))
+        if rollup is None:
+            rollup = rollups[assignee_id, status] = TaskRollup(
+                day=day, assignee_id=assignee_id, department_id=department_id, status=status,
+            )
+        rollup.tasks += total
+        rollup.overdue += late
+        rollup.days_in_status += max((day - entered).days, 0) * total
+    return list(rollups.values())
+
+
+def rollup(day=None):
+    """
+    Bring TaskRollup up to `day` (default today).
+
+    The last rolled day is the watermark: its COMPLETED rows and everything
+    after are rebuilt, so running several times a day only refreshes today.
+    """
+    day = day or timezone.localdate()
+    watermark = TaskRollup.objects.aggregate(last=Max("day"))["last"]
+    since = min(watermark, day) if watermark else day - timedelta(days=BACKFILL_DAYS)
+
+    completed = completed_rows(since, day)
+    snapshot = open_rows(day)
+    with transaction.atomic():
+        TaskRollup.objects.filter(status=Task.Status.COMPLETED, day__gte=since, day__lte=day).delete()
+        TaskRollup.objects.filter(day=day).exclude(status=Task.Status.COMPLETED).delete()
+        TaskRollup.objects.bulk_create(completed + snapshot)
+    return RollupReport(since, len(completed), len(snapshot))
+
+
+def department_report(department_id=None, days=REPORT_DAYS):
+    """
+    Analytics for one department (or all when `department_id` is None),
+    read from TaskRollup and TaskStatusEvent only.
+    """
+    rollups = TaskRollup.objects.all()
+    if department_id is not None:
+        rollups = rollups.filter(department_id=department_id)
+
+    start = timezone.localdate() - timedelta(days=days - 1)
+    completed_per_day = list(
+        rollups.filter(status=Task.Status.COMPLETED, day__gte=start)
+        .values("day")
+        .annotate(tasks=Sum("tasks"), late=Sum("overdue"))
+        .order_by("day")
+    )
+
+    snapshot_day = rollups.filter(status__in=UNFINISHED_STATUSES).aggregate(last=Max("day"))["last"]
+    snapshot = rollups.filter(day=snapshot_day, status__in=UNFINISHED_STATUSES)
+
+    # Completed stints from the status history, e.g. how long tasks sat in review
+    stints = average_time_in_status(timezone.now() - timedelta(days=days), department_id)
+
+    statuses = []
+    totals = {
+        row["status"]: row
+        for row in snapshot.values("status").annotate(
+            tasks=Sum("tasks"), overdue=Sum("overdue"), days=Sum("days_in_status")
+        )
+    }
+    for status in UNFINISHED_STATUSES:
+        row = totals.get(status, {"tasks": 0, "overdue": 0, "days": 0})
+        statuses.append({
+            "status": Task.Status(status).label,
+            "tasks": row["tasks"],
+            "overdue": row["overdue"],
+            "average_days": round(row["days"] / row["tasks"], 1) if row["tasks"] else None,
+            "average_stint_days": round(stints[status].total_seconds() / 86400, 1) if stints.get(status) else None,
+        })
+
+    load = list(
+        snapshot.values("assignee_id", "assignee__first_name", "assignee__username")
+        .annotate(
+            open=Sum("tasks", filter=Q(status__in=Task.OPEN_STATUSES)),
+            unfinished=Sum("tasks"),
+            overdue=Sum("overdue"),
+        )
+        .order_by("-unfinished", "assignee__first_name")
+    )
+
+    return {
+        "completed_per_day": completed_per_day,
+        "completed_total": sum(row["tasks"] for row in completed_per_day),
+        "snapshot_day": snapshot_day,
+        "statuses": statuses,
+        "overdue_total": sum(row["overdue"] for row in statuses),
+        "load": load,
+    }
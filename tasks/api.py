@@ -0,0 +1,200 @@
+"""
+JSON API for the employee/manager clients.
+
+GET  tasks/api/          Task list with ETag/If-None-Match, ?fields=, ?status=,
+                         ?scope=team (staff) and keyset cursors (?after=/?before=)
+POST tasks/api/status/   Batch status update: {"changes": [{"id", "status", "from"}, ...]}
+
+Session authentication, same as the rest of the site.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .cache import get_task_version, invalidate_status_counts
+from .history import Transition, record_transitions
+from .models import Task
+from .pagination import KeysetPage
+from .transitions import ASSIGNEE, actor_for, is_allowed
+
+# Public field name -> column
+API_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "priority": "priority",
+    "status": "status",
+    "created_at": "created_at",
+    "status_updated_at": "status_updated_at",
+    "deadline": "deadline",
+    "assigned_to": "assigned_to_id",
+    "assigned_by": "assigned_by_id",
+}
+DEFAULT_FIELDS = ("id", "title", "priority", "status", "deadline", "assigned_by")
+
+API_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BATCH = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_view(view):
+    """401 instead of the login redirect, and ApiError as a JSON error body."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
+    return wrapper
+
+
+def team_scope(request):
+    return request.GET.get("scope") == "team" and actor_for(request.user) != ASSIGNEE
+
+
+def scoped_tasks(request):
+    # Own tasks as in task_list_by_status, or with ?scope=team the TaskAdmin role rules
+    if team_scope(request):
+        return Task.objects.visible_to(request.user)
+    return Task.objects.filter(assigned_to=request.user)
+
+
+def list_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    # Bumped on every write to the user's tasks (or any task for the team scope)
+    version = get_task_version(None if team_scope(request) else request.user.pk)
+    if version is None:
+        return None
+    return hashlib.md5(f"{request.user.pk}:{version}:{request.get_full_path()}".encode()).hexdigest()
+
+
+def selected_fields(request):
+    names = [name.strip() for name in request.GET.get("fields", "").split(",") if name.strip()]
+    unknown = set(names) - set(API_FIELDS)
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+    return names or list(DEFAULT_FIELDS)
+
+
+@api_view
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=list_etag)
+def task_list(request):
+    fields = selected_fields(request)
+    tasks = scoped_tasks(request)
+    status = request.GET.get("status")
+    if status:
+        if status not in Task.Status.values:
+            raise ApiError(f"Unknown status {status!r}.")
+        tasks = tasks.filter(status=status)
+    try:
+        per_page = min(int(request.GET.get("limit", API_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ApiError("limit must be a number.")
+
+    # deadline and id are always read for the cursors
+    columns = {API_FIELDS[name] for name in fields} | {"id", "deadline"}
+    page = KeysetPage(
+        tasks.values(*columns),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=max(per_page, 1),
+    )
+    return JsonResponse({
+        "results": [{name: row[API_FIELDS[name]] for name in fields} for row in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+def parse_changes(request):
+    try:
+        changes = json.loads(request.body)["changes"]
+    except (ValueError, KeyError, TypeError):
+        raise ApiError('Expected a JSON body like {"changes": [{"id": 1, "status": "REVIEW"}]}.')
+    if not isinstance(changes, list) or len(changes) > MAX_BATCH:
+        raise ApiError(f"changes must be a list of at most {MAX_BATCH} items.")
+    return changes
+
+
+@api_view
+@require_POST
+def update_status(request):
+    """
+    Apply many status changes with one locked read and one conditional UPDATE
+    per (from, to) pair. Each change may carry "from", the status the client
+    last saw; it is a conflict if the task has moved on since.
+    """
+    changes = parse_changes(request)
+    actor = actor_for(request.user)
+    tasks = Task.objects.visible_to(request.user) if actor != ASSIGNEE else Task.objects.filter(assigned_to=request.user)
+    # Same lock as the admin: managers can't move Admin-assigned tasks
+    admin_locked = request.user.role == request.user.Role.MANAGER and not request.user.is_superuser
+
+    results = [None] * len(changes)
+    wanted = {}
+    for i, change in enumerate(changes):
+        task_id = change.get("id") if isinstance(change, dict) else None
+        if not isinstance(task_id, int) or change.get("status") not in Task.Status.values:
+            results[i] = {"id": task_id, "ok": False, "error": "invalid"}
+        elif task_id in wanted:
+            results[i] = {"id": task_id, "ok": False, "error": "duplicate"}
+        else:
+            wanted[task_id] = i
+
+    moved_assignees = set()
+    with transaction.atomic():
+        current = {
+            pk: (status, assignee_id, department_id, assigned_by_role)
+            for pk, status, assignee_id, department_id, assigned_by_role in tasks.filter(pk__in=wanted)
+            .select_for_update(of=("self",))
+            .values_list("id", "status", "assigned_to_id", "assigned_to__department_id", "assigned_by__role")
+        }
+        groups = {}
+        for task_id, i in wanted.items():
+            to_status, expected = changes[i]["status"], changes[i].get("from")
+            if task_id not in current:
+                results[i] = {"id": task_id, "ok": False, "error": "not_found"}
+                continue
+            status, _, _, assigned_by_role = current[task_id]
+            if admin_locked and assigned_by_role == request.user.Role.ADMIN:
+                results[i] = {"id": task_id, "ok": False, "error": "locked", "status": status}
+            elif expected is not None and expected != status:
+                results[i] = {"id": task_id, "ok": False, "error": "conflict", "status": status}
+            elif not is_allowed(actor, status, to_status):
+                results[i] = {"id": task_id, "ok": False, "error": "not_allowed", "status": status}
+            else:
+                groups.setdefault((status, to_status), []).append(task_id)
+                results[i] = {"id": task_id, "ok": True, "status": to_status}
+
+        today = timezone.localdate()
+        for (from_status, to_status), ids in groups.items():
+            if from_status != to_status:
+                Task.objects.filter(pk__in=ids, status=from_status).update(status=to_status, status_updated_at=today)
+        record_transitions(
+            Transition(task_id, current[task_id][1], current[task_id][2], from_status, to_status)
+            for (from_status, to_status), ids in groups.items()
+            for task_id in ids
+        )
+        moved_assignees = {current[task_id][1] for ids in groups.values() for task_id in ids}
+
+    # .update() skips post_save, so drop the sidebar counts and versions here
+    invalidate_status_counts(*moved_assignees)
+    return JsonResponse({"results": results})
@@ -0,0 +1,91 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Task
+
+STATUS_COUNTS_TIMEOUT = 60 * 60
+TASK_VERSION_TIMEOUT = 60 * 60
+
+DEPARTMENT_COUNTS_KEY = "tasks:department_status_counts"
+
+
+def status_counts_key(user_id):
+    return f"tasks:status_counts:{user_id}"
+
+
+def get_status_counts(user):
+    """Return {status: count} for the user's tasks, from cache when possible."""
+    key = status_counts_key(user.pk)
+    counts = cache.get(key)
+    if counts is None:
+        # One GROUP BY status instead of a COUNT per sidebar link
+        counts = dict.fromkeys(Task.Status.values, 0)
+        rows = (
+            Task.objects.filter(assigned_to=user)
+            .order_by()
+            .values_list("status")
+            .annotate(total=Count("id"))
+        )
+        counts.update(rows)
+        cache.set(key, counts, STATUS_COUNTS_TIMEOUT)
+    return counts
+
+
+def get_department_status_counts():
+    """
+    Return {(department_id, status): count} over every task, from cache when
+    possible. Backs the TaskAdmin changelist counts (see TaskAdmin.get_paginator).
+    """
+    counts = cache.get(DEPARTMENT_COUNTS_KEY)
+    if counts is None:
+        rows = (
+            Task.objects.order_by()
+            .values_list("assigned_to__department", "status")
+            .annotate(total=Count("id"))
+        )
+        counts = {(department_id, status): total for department_id, status, total in rows}
+        cache.set(DEPARTMENT_COUNTS_KEY, counts, STATUS_COUNTS_TIMEOUT)
+    return counts
+
+
+def task_version_key(user_id=None):
+    return f"tasks:version:{user_id or 'all'}"
+
+
+def get_task_version(user_id=None):
+    """
+    Random token that changes whenever one of the user's tasks changes (or,
+    without a user, any task). Used for ETags.
+
+    None when the cache is per process (settings.SHARED_CACHE is off): other
+    workers never see the invalidation, so there is no token to trust.
+    """
+    if not settings.SHARED_CACHE:
+        return None
+    # Finite, so a missed invalidation can only be served for so long
+    return cache.get_or_set(
+        task_version_key(user_id), lambda: uuid.uuid4().hex, TASK_VERSION_TIMEOUT
+    )
+
+
+def invalidate_task_versions(*user_ids):
+    """Change the version (and so the task list ETag) of these users without touching their counts."""
+    keys = [task_version_key(user_id) for user_id in user_ids if user_id]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_status_counts(*user_ids):
+    # Any task write can move the department totals and the team-wide version too
+    user_ids = [user_id for user_id in user_ids if user_id]
+    keys = [status_counts_key(user_id) for user_id in user_ids]
+    keys += [task_version_key(user_id) for user_id in user_ids]
+    keys += [DEPARTMENT_COUNTS_KEY, task_version_key()]
+    cache.delete_many(keys)
+    # A concurrent request can refill the keys from the pre-write rows before the
+    # write commits, so drop them again once it has (immediately outside a transaction)
+    transaction.on_commit(lambda: cache.delete_many(keys))
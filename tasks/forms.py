@@ -1,2 +1,10 @@
 from django import forms
+from django.core import validators
 from .models import Task
+
+
+class TaskImportForm(forms.Form):
+    file = forms.FileField(
+        label="Spreadsheet",
+        validators=[validators.FileExtensionValidator(["csv", "jsonl", "json", "xlsx"])],
+    )
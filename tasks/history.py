@@ -0,0 +1,64 @@
+from collections import namedtuple
+from datetime import datetime, time
+
+from django.db.models import Avg, DurationField, ExpressionWrapper, F, Max
+from django.utils import timezone
+
+from .models import Task, TaskStatusEvent
+
+# One status change of one task
+Transition = namedtuple("Transition", ["task_id", "assignee_id", "department_id", "from_status", "to_status"])
+
+
+def record_transitions(transitions, changed_at=None):
+    """
+    Append a TaskStatusEvent per transition with one lookup of when each task
+    entered its current status (its last event, else the day it was created)
+    and one INSERT.
+    """
+    transitions = [t for t in transitions if t.from_status != t.to_status]
+    if not transitions:
+        return []
+    changed_at = changed_at or timezone.now()
+    entered = {
+        task_id: last or timezone.make_aware(datetime.combine(created_at, time.min))
+        for task_id, created_at, last in Task.objects.filter(pk__in=[t.task_id for t in transitions])
+        .values("pk", "created_at")
+        .annotate(last=Max("status_events__changed_at"))
+        .values_list("pk", "created_at", "last")
+    }
+    events = [
+        TaskStatusEvent(
+            task_id=t.task_id,
+            assignee_id=t.assignee_id,
+            department_id=t.department_id,
+            from_status=TaskStatusEvent.Status[t.from_status],
+            to_status=TaskStatusEvent.Status[t.to_status],
+            entered_at=entered[t.task_id],
+            changed_at=changed_at,
+        )
+        for t in transitions
+        if t.task_id in entered
+    ]
+    return TaskStatusEvent.objects.bulk_create(events)
+
+
+def record_task_change(task, from_status):
+    """record_transitions() for one saved Task (assigned_to should be loaded or cached)."""
+    return record_transitions([
+        Transition(task.pk, task.assigned_to_id, task.assigned_to.department_id, from_status, task.status)
+    ])
+
+
+def average_time_in_status(since, department_id=None):
+    """{Task.Status value: average timedelta spent in it} over the stints that ended since `since`."""
+    events = TaskStatusEvent.objects.filter(changed_at__gte=since)
+    if department_id is not None:
+        events = events.filter(department_id=department_id)
+    rows = (
+        events.order_by()
+        .values("from_status")
+        .annotate(average=Avg(ExpressionWrapper(F("changed_at") - F("entered_at"), output_field=DurationField())))
+        .values_list("from_status", "average")
+    )
+    return {TaskStatusEvent.Status(code).name: average for code, average in rows}
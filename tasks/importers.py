@@ -0,0 +1,150 @@
+import csv
+import io
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from users.importers import read_rows
+from .cache import invalidate_status_counts
+from .mail import queue_assignment_emails
+from .models import Task
+
+IMPORT_BATCH_SIZE = 500
+
+TaskImportReport = namedtuple("TaskImportReport", ["created", "errors"])
+
+
+def read_xlsx_rows(stream):
+    """Yield (row number, row dict) from the first sheet of an .xlsx workbook."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValidationError("Excel import needs the openpyxl package; upload a CSV instead.")
+    try:
+        sheet = load_workbook(stream, read_only=True, data_only=True).active
+    except (zipfile.BadZipFile, KeyError, OSError, ValueError):
+        raise ValidationError("The file is not a valid Excel (.xlsx) workbook.")
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell or "").strip().lower() for cell in next(rows, ())]
+    for row_no, row in enumerate(rows, start=2):
+        if any(cell not in (None, "") for cell in row):
+            yield row_no, dict(zip(header, row))
+
+
+def parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value or "").strip())
+    except ValueError:
+        raise ValidationError(f"Deadline {value!r} is not a YYYY-MM-DD date.")
+
+
+class TaskImporter:
+    """
+    Create tasks in bulk on behalf of `assigned_by`.
+
+    Assignees are given by email or DOB ID and resolved in one query against
+    `assignees`, the same role/department-scoped queryset the TaskAdmin form
+    offers, so managers can only import tasks for their own department.
+    """
+
+    def __init__(self, assigned_by, assignees, batch_size=IMPORT_BATCH_SIZE):
+        self.assigned_by = assigned_by
+        self.assignees = assignees
+        self.batch_size = batch_size
+        self.priorities = self.choice_lookup(Task.Priority)
+        self.statuses = self.choice_lookup(Task.Status)
+
+    @staticmethod
+    def choice_lookup(choices):
+        lookup = {}
+        for choice in choices:
+            lookup[choice.value.lower()] = choice.value
+            lookup[choice.label.lower()] = choice.value
+        return lookup
+
+    def resolve_assignees(self, rows):
+        keys = {str(row.get("assigned_to") or "").strip().lower() for _, row in rows if isinstance(row, dict)}
+        keys.discard("")
+        users = {}
+        # Keys are lowercased, so compare against lowercased columns too
+        matches = self.assignees.annotate(
+            email_key=Lower("email"), username_key=Lower("username"), dob_id_key=Lower("dob_id"),
+        ).filter(Q(email_key__in=keys) | Q(username_key__in=keys) | Q(dob_id_key__in=keys))
+        for user in matches:
+            for key in (user.email, user.username, user.dob_id):
+                if key:
+                    users[key.lower()] = user
+        return users
+
+    def build(self, row, users):
+        if not isinstance(row, dict):
+            raise ValidationError("Malformed row.")
+
+        def value(key):
+            return str(row.get(key) or "").strip()
+
+        title = value("title")
+        if not title:
+            raise ValidationError("title is required.")
+        assignee = users.get(value("assigned_to").lower())
+        if assignee is None:
+            raise ValidationError(f"Assignee {value('assigned_to')!r} not found or not in your department.")
+        priority = self.priorities.get((value("priority") or Task.Priority.MEDIUM).lower())
+        if priority is None:
+            raise ValidationError(f"Unknown priority {value('priority')!r}.")
+        status = self.statuses.get((value("status") or Task.Status.PENDING).lower())
+        if status is None:
+            raise ValidationError(f"Unknown status {value('status')!r}.")
+
+        return Task(
+            title=title[:255],
+            description=value("description"),
+            priority=priority,
+            status=status,
+            deadline=parse_date(row.get("deadline")),
+            assigned_to=assignee,
+            assigned_by=self.assigned_by,
+        )
+
+    def run(self, rows):
+        try:
+            rows = list(rows)
+        except UnicodeDecodeError:
+            raise ValidationError("The file is not UTF-8 text; save it as \"CSV UTF-8\" and upload it again.")
+        except csv.Error as e:
+            raise ValidationError(f"The file could not be read as CSV: {e}")
+        users = self.resolve_assignees(rows)
+
+        tasks, errors = [], []
+        for line_no, row in rows:
+            try:
+                tasks.append(self.build(row, users))
+            except ValidationError as e:
+                errors.append((line_no, "; ".join(e.messages)))
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+            # One outbox insert for every assignment email, delivered by send_queued_mail
+            queue_assignment_emails(tasks)
+        # bulk_create skips post_save, so drop the sidebar counts here
+        invalidate_status_counts(*{task.assigned_to_id for task in tasks})
+        return TaskImportReport(len(tasks), errors)
+
+
+def read_task_file(stream, name, fmt=None):
+    """Rows from a CSV/JSONL text stream or an .xlsx binary stream."""
+    fmt = fmt or name.rsplit(".", 1)[-1].lower()
+    if fmt == "xlsx":
+        return read_xlsx_rows(stream)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    return read_rows(stream, "jsonl" if fmt in ("jsonl", "json") else "csv")
@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import NotificationLog, OutboundEmail
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_CAP = timedelta(hours=2)
+# How long a claimed batch is hidden from other workers while it is sent
+SEND_LEASE = timedelta(minutes=10)
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    """
+    Store an email in the outbox instead of talking to SMTP on the request.
+
+    Runs on the caller's connection, so a message queued from an atomic block
+    (e.g. the admin save) is only visible to the worker once that commits.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=",".join(recipient_list),
+    )
+
+
+def assignment_email(task):
+    """OutboundEmail (unsaved) telling task.assigned_to about a new task."""
+    subject = f"New Task Assigned: {task.title}"
+    message = (
+        f"Hello {task.assigned_to.first_name},\n\n"
+        f"You have been assigned a new task: {task.title}\n"
+        f"Priority: {task.get_priority_display()}\n"
+        f"Deadline: {task.deadline}\n\n"
+        f"Description:\n{task.description}\n\n"
+        f"Link: http://task.dobltd.com \n\n"
+        f"Please log in to your dashboard to view details."
+    )
+    return OutboundEmail(
+        subject=subject[:255],
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=task.assigned_to.email or task.assigned_to.username,
+    )
+
+
+def queue_assignment_emails(tasks):
+    """Queue assignment emails for saved tasks and record them in the ledger, in two inserts."""
+    OutboundEmail.objects.bulk_create([assignment_email(task) for task in tasks])
+    NotificationLog.record(
+        NotificationLog.Kind.ASSIGNMENT,
+        timezone.localdate(),
+        [(task.pk, task.assigned_to_id) for task in tasks],
+    )
+
+
+def backoff(attempts):
+    # 30s, 1m, 2m, 4m ... capped at BACKOFF_CAP
+    return min(BACKOFF_BASE * (2 ** (attempts - 1)), BACKOFF_CAP)
+
+
+def claim_batch(batch_size, lease=SEND_LEASE):
+    """
+    Take up to batch_size due messages and push their next_attempt_at past the
+    lease, so other workers skip them while they are sent. Short transaction:
+    the SMTP session itself runs outside it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        qs = OutboundEmail.objects.filter(
+            status=OutboundEmail.Status.QUEUED,
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at", "id")
+        # Let several workers drain the queue side by side where the backend can
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        batch = list(qs[:batch_size])
+        # If the worker dies mid-send the messages become due again once the lease runs out
+        OutboundEmail.objects.filter(pk__in=[outbound.pk for outbound in batch]).update(next_attempt_at=now + lease)
+    return batch
+
+
+def record_failure(outbound, error, now, max_attempts):
+    outbound.attempts += 1
+    outbound.last_error = str(error)[:1000]
+    if outbound.attempts >= max_attempts:
+        # Dead-letter: kept for inspection/requeue from the admin
+        outbound.status = OutboundEmail.Status.DEAD
+        return False
+    outbound.next_attempt_at = now + backoff(outbound.attempts)
+    return True
+
+
+def send_queued_batch(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Send one batch of due messages over a single SMTP connection, outside any
+    transaction so the database stays writable while SMTP is slow.
+
+    Returns (sent, retried, dead) counts.
+    """
+    sent = retried = dead = 0
+    batch = claim_batch(batch_size)
+    if not batch:
+        return sent, retried, dead
+
+    now = timezone.now()
+    smtp = get_connection(fail_silently=False)
+    try:
+        smtp.open()
+    except Exception as e:
+        # Could not even connect: every message in the batch counts as a failed attempt
+        for outbound in batch:
+            if record_failure(outbound, e, now, max_attempts):
+                retried += 1
+            else:
+                dead += 1
+    else:
+        try:
+            for outbound in batch:
+                message = EmailMessage(outbound.subject, outbound.body, outbound.from_email, outbound.recipients)
+                try:
+                    smtp.send_messages([message])
+                except Exception as e:
+                    if record_failure(outbound, e, now, max_attempts):
+                        retried += 1
+                    else:
+                        dead += 1
+                else:
+                    outbound.attempts += 1
+                    outbound.status = OutboundEmail.Status.SENT
+                    outbound.sent_at = timezone.now()
+                    outbound.last_error = ""
+                    sent += 1
+        finally:
+            smtp.close()
+
+    # Second short transaction for the results
+    OutboundEmail.objects.bulk_update(
+        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+    return sent, retried, dead
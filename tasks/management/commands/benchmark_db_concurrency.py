@@ -0,0 +1,121 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.db import apply_sqlite_pragmas
+
+STATUSES = ("PENDING", "IN_PROGRESS", "REVIEW", "COMPLETED")
+
+
+def connect(path, tuned, busy_timeout):
+    conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+    if tuned:
+        apply_sqlite_pragmas(conn, busy_timeout * 1000)
+    return conn
+
+
+def setup_database(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE task (id INTEGER PRIMARY KEY, assigned_to_id INTEGER, status TEXT, priority TEXT, updated TEXT)"
+    )
+    conn.execute("CREATE INDEX task_assignee_status ON task (assigned_to_id, status)")
+    conn.executemany(
+        "INSERT INTO task (assigned_to_id, status, priority, updated) VALUES (?, ?, 'MEDIUM', date('now'))",
+        ((i % 200, random.choice(STATUSES)) for i in range(rows)),
+    )
+    conn.close()
+
+
+def run_workload(path, tuned, writers, readers, seconds, busy_timeout, rows):
+    """Mimic employee status updates and list_editable saves against employee list reads."""
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    # Tuned mode takes the write lock up front, like DATABASES transaction_mode=IMMEDIATE
+    begin = "BEGIN IMMEDIATE" if tuned else "BEGIN"
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        conn = connect(path, tuned, busy_timeout)
+        while time.monotonic() < deadline:
+            task_id = random.randint(1, rows)
+            try:
+                conn.execute(begin)
+                # Read-then-write, as update_task_status and TaskAdmin.save_model do
+                conn.execute("SELECT status FROM task WHERE id = ?", (task_id,)).fetchone()
+                conn.execute(
+                    "UPDATE task SET status = ?, updated = date('now') WHERE id = ?",
+                    (random.choice(STATUSES), task_id),
+                )
+                conn.execute("COMMIT")
+                bump("writes")
+            except sqlite3.OperationalError:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                bump("locked")
+        conn.close()
+
+    def reader():
+        conn = connect(path, tuned, busy_timeout)
+        while time.monotonic() < deadline:
+            try:
+                conn.execute(
+                    "SELECT id, status FROM task WHERE assigned_to_id = ? AND status = ?",
+                    (random.randint(0, 199), random.choice(STATUSES)),
+                ).fetchall()
+                bump("reads")
+            except sqlite3.OperationalError:
+                bump("locked")
+        conn.close()
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare SQLite write/read throughput under concurrency with default journaling "
+        "versus the WAL settings from project/db.py. Uses a throwaway database file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--busy-timeout", type=float, default=5.0, help="Seconds a writer waits for the lock.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for label, tuned in (("default", False), ("tuned", True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                setup_database(path, options["rows"])
+                counts = run_workload(
+                    path, tuned, options["writers"], options["readers"],
+                    options["seconds"], options["busy_timeout"], options["rows"],
+                )
+            results[label] = counts
+            self.stdout.write(
+                f"{label:>8}: {counts['writes'] / options['seconds']:8.1f} writes/s  "
+                f"{counts['reads'] / options['seconds']:8.1f} reads/s  "
+                f"{counts['locked']:5d} 'database is locked' errors"
+            )
+
+        if results["default"]["writes"]:
+            speedup = results["tuned"]["writes"] / results["default"]["writes"]
+            self.stdout.write(self.style.SUCCESS(f"Write throughput: {speedup:.1f}x with WAL tuning"))
@@ -0,0 +1,61 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from tasks.models import Task, TaskStatusEvent
+from tasks.reminders import tasks_due
+
+
+# Plan lines that mean the whole tasks table is being read, per backend
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN tasks_task(statusevent)?\b"),
+    "postgresql": re.compile(r"Seq Scan on tasks_task(statusevent)?\b"),
+}
+
+
+def hot_queries():
+    """Querysets for the access paths every page uses, keyed by a label."""
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    return {
+        # tasks.views.task_list_by_status
+        "employee task list": Task.objects.filter(assigned_to_id=1, status=Task.Status.PENDING).order_by("deadline", "id"),
+        # tasks.reminders.send_deadline_reminders
+        "deadline reminders": tasks_due(tomorrow),
+        # TaskAdmin changelist filtered from the Jazzmin sidebar links
+        "admin status filter": Task.objects.filter(status=Task.Status.REVIEW),
+        # TaskAdmin changelist for a manager / department filter
+        "admin department filter": Task.objects.filter(assigned_to__department_id=1),
+        # tasks.analytics.rollup: tasks completed since the last rollup
+        "analytics rollup": TaskStatusEvent.objects.filter(
+            to_status=TaskStatusEvent.Status.COMPLETED, changed_at__gte=timezone.now() - timedelta(days=1)
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN QUERY PLAN on the hot Task queries and fail if any of them scans the whole table."
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(f"Query plan check not supported on {connection.vendor}, skipping."))
+            return
+
+        failures = []
+        for label, queryset in hot_queries().items():
+            plan = queryset.explain()
+            scans = [line for line in plan.splitlines() if pattern.search(line)]
+            if scans:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"[SCAN] {label}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[ OK ] {label}"))
+            if options["verbosity"] > 1 or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f"       {line}")
+
+        if failures:
+            raise CommandError(f"Full table scan in: {', '.join(failures)}. Check Task.Meta.indexes.")
@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from tasks.importers import IMPORT_BATCH_SIZE, TaskImporter, read_task_file
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create tasks from a CSV, JSONL or .xlsx file with title, description, priority, "
+        "deadline, assigned_to (email or DOB ID) and optional status columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--assigned-by", required=True,
+            help="Email or DOB ID of the admin/manager creating the tasks; their department scoping applies.",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        key = options["assigned_by"]
+        try:
+            assigned_by = CustomUser.objects.get(Q(username=key) | Q(email=key) | Q(dob_id=key))
+        except (CustomUser.DoesNotExist, CustomUser.MultipleObjectsReturned):
+            raise CommandError(f"No single user matches {key!r}.")
+
+        importer = TaskImporter(assigned_by, assigned_by.visible_users(), options["batch_size"])
+        path = options["path"]
+        try:
+            with open(path, "rb") as stream:
+                report = importer.run(read_task_file(stream, path))
+        except (OSError, ValidationError) as e:
+            raise CommandError(e)
+
+        for line_no, error in report.errors:
+            self.stderr.write(f"line {line_no}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created} task(s); {len(report.errors)} row(s) skipped."
+        ))
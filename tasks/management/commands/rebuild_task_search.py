@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = "Recreate the task full-text index and its triggers, and reindex every task."
+
+    def handle(self, *args, **options):
+        search.install(rebuild=True)
+        self.stdout.write(self.style.SUCCESS("Task search index rebuilt."))
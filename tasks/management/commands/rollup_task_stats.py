@@ -0,0 +1,37 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.analytics import rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the TaskRollup table behind the task analytics page up to date. "
+        "Schedule it from cron, e.g. '0 * * * *'; each run only rereads tasks changed since the last one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", help="Roll up to this day (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds to sleep between passes with --loop.")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options["day"]) if options["day"] else None
+        except ValueError:
+            raise CommandError("--day must be YYYY-MM-DD")
+
+        try:
+            while True:
+                report = rollup(day)
+                self.stdout.write(
+                    f"Rolled up since {report.since}: {report.completed_rows} completed row(s), "
+                    f"{report.open_rows} open row(s)"
+                )
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
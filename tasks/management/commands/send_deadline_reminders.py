@@ -0,0 +1,55 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from tasks.models import ReminderRun
+from tasks.reminders import REMINDER_CHUNK_SIZE, LeaseLost, enqueue_reminders, run_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Send deadline reminders for tomorrow plus any runs queued from the admin, "
+        "resuming interrupted runs. Schedule it from cron, e.g. '*/10 * * * *'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--day", help="Deadline to remind about (YYYY-MM-DD). Defaults to tomorrow.")
+        parser.add_argument("--chunk-size", type=int, default=REMINDER_CHUNK_SIZE, help="Assignees per checkpoint.")
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds to sleep between passes with --loop.")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options["day"]) if options["day"] else None
+        except ValueError:
+            raise CommandError("--day must be YYYY-MM-DD")
+
+        try:
+            while True:
+                enqueue_reminders(day)
+                # Runs queued from the admin link, and any that were interrupted mid-way;
+                # run_reminders skips those another pass still holds the lease on
+                pending = ReminderRun.objects.filter(
+                    Q(status=ReminderRun.Status.QUEUED) | Q(status=ReminderRun.Status.RUNNING)
+                ).order_by("day")
+                for run in pending:
+                    resumed = " (resumed)" if run.status == ReminderRun.Status.RUNNING else ""
+                    try:
+                        report = run_reminders(run, options["chunk_size"])
+                    except LeaseLost as e:
+                        self.stderr.write(str(e))
+                        continue
+                    if report is None:
+                        # Another pass is still sending it
+                        continue
+                    self.stdout.write(
+                        f"{run.day}{resumed}: {report.tasks} task(s), {report.recipients} recipient(s), "
+                        f"{report.sent} sent, {report.failed} failed in {report.seconds:.2f}s"
+                    )
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
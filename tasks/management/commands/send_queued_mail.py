@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.mail import MAX_ATTEMPTS, send_queued_batch
+
+
+class Command(BaseCommand):
+    help = "Drain the outbound email queue, retrying failures with exponential backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the queue is empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        try:
+            while True:
+                counts = send_queued_batch(options["batch_size"], options["max_attempts"])
+                totals = [total + count for total, count in zip(totals, counts)]
+                if any(counts):
+                    self.stdout.write("sent=%d retried=%d dead=%d" % counts)
+                # A full batch means there is probably more waiting
+                if sum(counts) >= options["batch_size"]:
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Done: sent=%d retried=%d dead=%d" % tuple(totals)))
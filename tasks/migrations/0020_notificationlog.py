@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0019_reminderrun'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Assignment'), (2, 'Deadline reminder')])),
+                ('day', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'kind'], name='notification_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'recipient', 'kind', 'day'), name='unique_notification')],
+            },
+        ),
+    ]
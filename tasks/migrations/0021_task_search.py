@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:30
+
+from django.db import migrations
+
+
+# Only the index; its SQLite sync triggers are (re)created on post_migrate,
+# see tasks/search.py
+def create_search_index(apps, schema_editor):
+    from tasks import search
+    search.create_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from tasks import search
+    search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0020_notificationlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0021_task_search'),
+        ('users', '0010_user_department_name_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_PROGRESS', 'In Progress'), ('REVIEW', 'Review'), ('COMPLETED', 'Completed'), ('BLOCKED', 'Blocked')], max_length=15)),
+                ('tasks', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('days_in_status', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'status_updated_at'], name='task_status_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskrollup',
+            name='assignee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='taskrollup',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.department'),
+        ),
+        migrations.AddIndex(
+            model_name='taskrollup',
+            index=models.Index(fields=['department', 'day'], name='rollup_department_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'assignee', 'status'), name='unique_task_rollup'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0022_taskrollup'),
+        ('users', '0010_user_department_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Review'), (4, 'Completed'), (5, 'Blocked')])),
+                ('to_status', models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Review'), (4, 'Completed'), (5, 'Blocked')])),
+                ('entered_at', models.DateTimeField()),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.department')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task', 'changed_at'], name='status_event_task_idx'), models.Index(fields=['department', 'from_status', 'changed_at'], name='status_event_time_in_idx')],
+            },
+        ),
+    ]
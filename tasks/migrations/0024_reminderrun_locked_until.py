@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0023_taskstatusevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reminderrun',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
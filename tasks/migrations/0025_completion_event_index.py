@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0024_reminderrun_locked_until'),
+        ('users', '0010_user_department_name_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_status_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='taskstatusevent',
+            index=models.Index(fields=['to_status', 'changed_at'], name='status_event_to_status_idx'),
+        ),
+    ]
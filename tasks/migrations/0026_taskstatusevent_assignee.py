@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_assignee(apps, schema_editor):
+    # Best guess for existing history: the task's current assignee
+    Task = apps.get_model("tasks", "Task")
+    TaskStatusEvent = apps.get_model("tasks", "TaskStatusEvent")
+    TaskStatusEvent.objects.update(
+        assignee=Subquery(Task.objects.filter(pk=OuterRef("task_id")).values("assigned_to_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0025_completion_event_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskstatusevent',
+            name='assignee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_assignee, migrations.RunPython.noop),
+    ]
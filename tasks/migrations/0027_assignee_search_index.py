@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:10
+
+from django.db import migrations
+
+
+# PostgreSQL: adds the assignee name index next to the task one (IF NOT EXISTS,
+# so 0021's index is left alone); SQLite already indexes names in its FTS table
+def create_search_index(apps, schema_editor):
+    from tasks import search
+    search.create_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0026_taskstatusevent_assignee'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, migrations.RunPython.noop),
+    ]
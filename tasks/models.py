@@ -3,6 +3,17 @@ from django.db import models
 from django.utils import timezone
 from datetime import date
 
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # Tasks a staff account may manage (TaskAdmin, the API team scope): admins
+        # everything, managers their own department, everyone else nothing
+        if user.is_superuser or user.role == user.Role.ADMIN:
+            return self
+        if user.role == user.Role.MANAGER and user.department_id:
+            return self.filter(assigned_to__department_id=user.department_id)
+        return self.none()
+
+
 class Task(models.Model):
     class Priority(models.TextChoices):
         LOW = "LOW", "Low"
@@ -27,7 +38,214 @@ class Task(models.Model):
     assigned_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="tasks_assigned")
     status_updated_at = models.DateField(auto_now=True, verbose_name="Updated at")
 
+    objects = TaskQuerySet.as_manager()
+
+    # Statuses that still need work; reminders and partial indexes key off these
+    OPEN_STATUSES = (Status.PENDING, Status.IN_PROGRESS)
+
+    # Allowed status changes and who may make them ("assignee" on their own tasks,
+    # "manager" for Admins/Managers in the admin). Compiled once in tasks/transitions.py
+    TRANSITIONS = (
+        (Status.PENDING, Status.IN_PROGRESS, ("assignee", "manager")),
+        (Status.IN_PROGRESS, Status.REVIEW, ("assignee", "manager")),
+        (Status.REVIEW, Status.COMPLETED, ("manager",)),
+        (Status.REVIEW, Status.IN_PROGRESS, ("manager",)),
+        (Status.PENDING, Status.BLOCKED, ("manager",)),
+        (Status.IN_PROGRESS, Status.BLOCKED, ("manager",)),
+        (Status.REVIEW, Status.BLOCKED, ("manager",)),
+        (Status.BLOCKED, Status.IN_PROGRESS, ("manager",)),
+        (Status.COMPLETED, Status.IN_PROGRESS, ("manager",)),
+    )
+
+    class Meta:
+        indexes = [
+            # Employee task list: assigned_to + status, ordered by deadline
+            models.Index(fields=["assigned_to", "status", "deadline"], name="task_assignee_status_idx"),
+            # Admin status filter and deadline lookups by status
+            models.Index(fields=["status", "deadline"], name="task_status_deadline_idx"),
+            # Deadline reminders only ever look at open tasks (partial where supported)
+            models.Index(
+                fields=["deadline"],
+                name="task_open_deadline_idx",
+                condition=models.Q(status__in=["PENDING", "IN_PROGRESS"]),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
 
+
+
+class OutboundEmail(models.Model):
+    """Outbox row for a notification email, drained by the send_queued_mail command."""
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        SENT = "SENT", "Sent"
+        DEAD = "DEAD", "Dead"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    # Comma-separated recipient addresses
+    to = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound email"
+        indexes = [
+            # Worker poll: due QUEUED rows in retry order
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {self.to}"
+
+    @property
+    def recipients(self):
+        return [address for address in self.to.split(",") if address]
+
+
+class ReminderRun(models.Model):
+    """Checkpoint for one day's deadline reminder job, so an interrupted run can resume."""
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+
+    day = models.DateField(unique=True, verbose_name="Deadline")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    # Assignees are processed in id order; everyone up to here has been emailed
+    last_user_id = models.PositiveBigIntegerField(default=0)
+    # Lease held by the pass sending this run, renewed as it goes; another pass
+    # only takes a RUNNING run over once it has expired
+    locked_until = models.DateTimeField(null=True, blank=True)
+    tasks = models.PositiveIntegerField(default=0)
+    recipients = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Reminders for {self.day} ({self.get_status_display()})"
+
+
+class NotificationLog(models.Model):
+    """One row per notification sent, used to skip duplicates and as a mail-volume audit trail."""
+
+    class Kind(models.IntegerChoices):
+        ASSIGNMENT = 1, "Assignment"
+        REMINDER = 2, "Deadline reminder"
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="notifications")
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    # Assignment: day it was sent. Reminder: the deadline being reminded about
+    day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["task", "recipient", "kind", "day"], name="unique_notification"),
+        ]
+        indexes = [
+            # Mail volume per day for the audit trail
+            models.Index(fields=["day", "kind"], name="notification_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.task_id} to {self.recipient_id} on {self.day}"
+
+    @classmethod
+    def already_sent(cls, kind, day, task_ids):
+        """Return the set of (task_id, recipient_id) already notified, in one query."""
+        return set(
+            cls.objects.filter(kind=kind, day=day, task_id__in=task_ids).values_list("task_id", "recipient_id")
+        )
+
+    @classmethod
+    def record(cls, kind, day, pairs):
+        cls.objects.bulk_create(
+            [cls(kind=kind, day=day, task_id=task_id, recipient_id=recipient_id) for task_id, recipient_id in pairs],
+            ignore_conflicts=True,
+        )
+
+
+class TaskRollup(models.Model):
+    """
+    Per-day, per-assignee, per-status task totals written by the
+    rollup_task_stats command and read by the TaskAdmin analytics page.
+
+    Open statuses are a snapshot of the day the rollup ran. COMPLETED rows
+    count the tasks completed on that day.
+    """
+
+    day = models.DateField()
+    assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    # Assignee's department when rolled up, so history survives moves
+    department = models.ForeignKey("users.Department", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=15, choices=Task.Status.choices)
+    tasks = models.PositiveIntegerField(default=0)
+    # Open: past their deadline on `day`. Completed: finished after their deadline
+    overdue = models.PositiveIntegerField(default=0)
+    # Sum over the tasks of days spent in `status` so far (open statuses only)
+    days_in_status = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "assignee", "status"], name="unique_task_rollup"),
+        ]
+        indexes = [
+            # Analytics page: one department over a date range
+            models.Index(fields=["department", "day"], name="rollup_department_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.assignee_id} {self.status}: {self.tasks}"
+
+
+class TaskStatusEvent(models.Model):
+    """
+    Append-only log of task status changes, written wherever a status is
+    changed (employee view, TaskAdmin, bulk actions; see tasks/history.py).
+    """
+
+    # Compact encoding of Task.Status; member names match Task.Status values
+    class Status(models.IntegerChoices):
+        PENDING = 1, "Pending"
+        IN_PROGRESS = 2, "In Progress"
+        REVIEW = 3, "Review"
+        COMPLETED = 4, "Completed"
+        BLOCKED = 5, "Blocked"
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="status_events")
+    # Who the task was assigned to when it changed, e.g. who completed it
+    assignee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    # Assignee's department at the time, so per-department queries need no join
+    department = models.ForeignKey("users.Department", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    from_status = models.PositiveSmallIntegerField(choices=Status.choices)
+    to_status = models.PositiveSmallIntegerField(choices=Status.choices)
+    # When the task entered from_status; changed_at - entered_at is the time spent in it
+    entered_at = models.DateTimeField()
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # History of one task / when it entered its current status
+            models.Index(fields=["task", "changed_at"], name="status_event_task_idx"),
+            # Time spent in a status per department over a period
+            models.Index(fields=["department", "from_status", "changed_at"], name="status_event_time_in_idx"),
+            # Analytics rollup: completions since the last rollup
+            models.Index(fields=["to_status", "changed_at"], name="status_event_to_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}: {self.get_from_status_display()} → {self.get_to_status_display()}"
@@ -0,0 +1,91 @@
+from datetime import date
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """
+    Seek pagination over a queryset ordered by (deadline, id).
+
+    Pages are addressed by the (deadline, id) of the row just before/after
+    them instead of an OFFSET, so every page costs one indexed range scan no
+    matter how deep the user has paged.
+    """
+
+    def __init__(self, queryset, after=None, before=None, per_page=25):
+        self.per_page = per_page
+        after = self.decode(after)
+        before = None if after else self.decode(before)
+
+        if before:
+            deadline, pk = before
+            rows = list(
+                queryset.filter(Q(deadline__lt=deadline) | Q(deadline=deadline, id__lt=pk))
+                .order_by("-deadline", "-id")[: per_page + 1]
+            )
+            self.has_previous = len(rows) > per_page
+            self.has_next = True
+            self.object_list = rows[:per_page][::-1]
+        else:
+            if after:
+                deadline, pk = after
+                queryset = queryset.filter(Q(deadline__gt=deadline) | Q(deadline=deadline, id__gt=pk))
+            rows = list(queryset.order_by("deadline", "id")[: per_page + 1])
+            self.has_previous = after is not None
+            self.has_next = len(rows) > per_page
+            self.object_list = rows[:per_page]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return self.encode(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return self.encode(self.object_list[0])
+        return None
+
+    @staticmethod
+    def encode(task):
+        # Model instances or .values() rows
+        if isinstance(task, dict):
+            return f"{task['deadline'].isoformat()}_{task['id']}"
+        return f"{task.deadline.isoformat()}_{task.id}"
+
+    @staticmethod
+    def decode(cursor):
+        # Malformed cursors fall back to the first page
+        if not cursor:
+            return None
+        try:
+            deadline, pk = cursor.split("_", 1)
+            return date.fromisoformat(deadline), int(pk)
+        except ValueError:
+            return None
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator that takes the total from `known_count` (e.g. a cached
+    counter) when given, instead of running COUNT(*) over the queryset.
+    """
+
+    def __init__(self, *args, known_count=None, **kwargs):
+        self.known_count = known_count
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        return super().count
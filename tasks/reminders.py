@@ -0,0 +1,215 @@
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NotificationLog, ReminderRun, Task
+
+logger = logging.getLogger(__name__)
+
+REMINDER_CHUNK_SIZE = 200
+# Renewed after every email, so it only runs out when the sending pass is gone
+REMINDER_LEASE = timedelta(minutes=5)
+
+ReminderReport = namedtuple("ReminderReport", ["tasks", "recipients", "sent", "failed", "seconds"])
+
+
+class LeaseLost(Exception):
+    pass
+
+
+def tasks_due(day):
+    # One joined query for the tasks and everything the email needs from the assignee
+    return (
+        Task.objects.filter(deadline=day, status__in=Task.OPEN_STATUSES)
+        .select_related("assigned_to")
+        .only(
+            "id", "title", "status", "deadline",
+            "assigned_to__email", "assigned_to__first_name", "assigned_to__username",
+        )
+        .order_by("assigned_to_id", "id")
+    )
+
+
+def due_phrase(day):
+    """'today', 'tomorrow' or 'on Mar 05', relative to the local date."""
+    days = (day - timezone.localdate()).days
+    if days == 0:
+        return "today"
+    if days == 1:
+        return "tomorrow"
+    return f"on {day:%b %d}"
+
+
+def build_reminder(user, tasks):
+    """One digest email per assignee covering all their tasks due that day."""
+    name = user.first_name or user.username
+    deadline = tasks[0].deadline
+    # Runs can be queued for any day, so don't assume tomorrow
+    due = due_phrase(deadline)
+    if len(tasks) == 1:
+        task = tasks[0]
+        subject = f"Reminder: Task '{task.title}' is due {due}!"
+        message = (
+            f"Hello {name},\n\n"
+            f"This is a reminder that your task '{task.title}' is due {due} ({deadline}).\n"
+            f"Current Status: {task.get_status_display()}\n\n"
+            f"Please ensure it is completed on time.\n\n"
+        )
+    else:
+        subject = f"Reminder: {len(tasks)} tasks are due {due}!"
+        lines = "\n".join(f"  - {task.title} ({task.get_status_display()})" for task in tasks)
+        message = (
+            f"Hello {name},\n\n"
+            f"This is a reminder that the following tasks are due {due} ({deadline}):\n"
+            f"{lines}\n\n"
+            f"Please ensure they are completed on time.\n\n"
+        )
+    message += "Regards,\nDOB Task Manager"
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+def send_batch(messages):
+    """
+    Send every message over one SMTP/TLS session, yielding a sent flag per
+    message as soon as it has gone out.
+    """
+    if not messages:
+        return
+    connection = get_connection(fail_silently=True)
+    done = 0
+    try:
+        connection.open()
+        for message in messages:
+            yield bool(connection.send_messages([message]))
+            done += 1
+    except Exception:
+        logger.exception("Sending deadline reminders failed")
+    finally:
+        connection.close()
+    yield from [False] * (len(messages) - done)
+
+
+def claim_run(run):
+    """
+    Take the lease on a QUEUED run, or a RUNNING one whose lease has expired,
+    with one conditional UPDATE. False if another pass holds it.
+    """
+    now = timezone.now()
+    lease = now + REMINDER_LEASE
+    claimed = (
+        ReminderRun.objects.filter(
+            pk=run.pk, status__in=[ReminderRun.Status.QUEUED, ReminderRun.Status.RUNNING],
+        )
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        .update(status=ReminderRun.Status.RUNNING, locked_until=lease)
+    )
+    if claimed:
+        run.refresh_from_db()
+    return bool(claimed)
+
+
+def renew_lease(run):
+    """Heartbeat: push the lease forward, unless another pass has taken the run over."""
+    lease = timezone.now() + REMINDER_LEASE
+    if not ReminderRun.objects.filter(pk=run.pk, locked_until=run.locked_until).update(locked_until=lease):
+        raise LeaseLost(f"Reminder run for {run.day} was taken over by another pass")
+    run.locked_until = lease
+
+
+def run_reminders(run, chunk_size=REMINDER_CHUNK_SIZE):
+    """
+    Send (or resume) the reminders for run.day; None if another pass holds it.
+
+    Assignees are handled in id order, `chunk_size` at a time. Each email is
+    written to the ledger as soon as it is sent and the run is checkpointed
+    after each chunk, so a restarted run picks up after the last assignee that
+    was already emailed and never re-sends a digest that went out.
+    """
+    started = time.monotonic()
+    if not claim_run(run):
+        return None
+
+    def flush(batch):
+        # Skip anything the ledger says was already reminded about (one lookup per chunk)
+        task_ids = [task.id for _, tasks in batch.values() for task in tasks]
+        done = NotificationLog.already_sent(NotificationLog.Kind.REMINDER, run.day, task_ids)
+        pending = []
+        for user, tasks in batch.values():
+            tasks = [task for task in tasks if (task.id, user.pk) not in done]
+            if tasks:
+                pending.append((user, tasks))
+
+        sent = 0
+        messages = [build_reminder(user, tasks) for user, tasks in pending]
+        # send_batch first, so it runs to the end and closes the connection
+        for ok, (user, tasks) in zip(send_batch(messages), pending):
+            if ok:
+                sent += 1
+                NotificationLog.record(NotificationLog.Kind.REMINDER, run.day, [(task.id, user.pk) for task in tasks])
+            renew_lease(run)
+        run.last_user_id = max(batch)
+        run.tasks += sum(len(tasks) for _, tasks in pending)
+        run.recipients += len(pending)
+        run.sent += sent
+        run.failed += len(pending) - sent
+        run.save(update_fields=["last_user_id", "tasks", "recipients", "sent", "failed"])
+
+    batch = {}
+    for task in tasks_due(run.day).filter(assigned_to_id__gt=run.last_user_id).iterator(chunk_size=2000):
+        if not task.assigned_to.email:
+            continue
+        # Only cut a chunk on an assignee boundary so digests stay whole
+        if task.assigned_to_id not in batch and len(batch) >= chunk_size:
+            flush(batch)
+            batch = {}
+        batch.setdefault(task.assigned_to_id, (task.assigned_to, []))[1].append(task)
+    if batch:
+        flush(batch)
+
+    run.status = ReminderRun.Status.DONE
+    run.finished_at = timezone.now()
+    run.locked_until = None
+    run.save(update_fields=["status", "finished_at", "locked_until"])
+
+    report = ReminderReport(
+        tasks=run.tasks,
+        recipients=run.recipients,
+        sent=run.sent,
+        failed=run.failed,
+        seconds=time.monotonic() - started,
+    )
+    logger.info(
+        "Deadline reminders for %s: %d task(s), %d recipient(s), %d sent, %d failed in %.2fs",
+        run.day, *report,
+    )
+    return report
+
+
+def enqueue_reminders(day=None, requeue=False):
+    """
+    Create the run for `day` (default: tomorrow) for the send_deadline_reminders
+    command, unless one exists.
+
+    With `requeue` (the admin link) a finished run is queued again from the
+    start; the notification ledger makes sure only tasks nobody was reminded
+    about yet get an email.
+    """
+    day = day or timezone.localdate() + timedelta(days=1)
+    run = ReminderRun.objects.get_or_create(day=day)[0]
+    if requeue and run.status == ReminderRun.Status.DONE:
+        ReminderRun.objects.filter(pk=run.pk, status=ReminderRun.Status.DONE).update(
+            status=ReminderRun.Status.QUEUED, last_user_id=0,
+        )
+        run.refresh_from_db()
+    return run
+
+
+def send_deadline_reminders(day=None, chunk_size=REMINDER_CHUNK_SIZE):
+    """Send the reminders for `day` (default: tomorrow) now, resuming a partial run."""
+    return run_reminders(enqueue_reminders(day, requeue=True), chunk_size)
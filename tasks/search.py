@@ -0,0 +1,201 @@
+"""
+Full-text task search.
+
+SQLite: an FTS5 table ``tasks_task_fts`` (rowid = task id) over title,
+description and the assignee's name, kept in sync by triggers on
+tasks_task and users_customuser. PostgreSQL: GIN indexes on the tsvector
+of title and description and on the tsvector of each user's names; every
+search word must match the task or its assignee.
+
+Migration 0021 creates the index. The SQLite triggers reference both
+tables, which breaks the table rebuilds SQLite migrations do, so they are
+dropped on pre_migrate and recreated (with a reindex) on post_migrate.
+"""
+
+import re
+
+from django.db import connection as default_connection
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "tasks_task_fts"
+
+SQLITE_CREATE = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, assignee, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description, assignee)
+        SELECT new.id, new.title, new.description, u.first_name || ' ' || u.username
+        FROM users_customuser u WHERE u.id = new.assigned_to_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update
+    AFTER UPDATE OF title, description, assigned_to_id ON tasks_task BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, description, assignee)
+        SELECT new.id, new.title, new.description, u.first_name || ' ' || u.username
+        FROM users_customuser u WHERE u.id = new.assigned_to_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_assignee
+    AFTER UPDATE OF first_name, username ON users_customuser BEGIN
+        UPDATE {FTS_TABLE} SET assignee = new.first_name || ' ' || new.username
+        WHERE rowid IN (SELECT id FROM tasks_task WHERE assigned_to_id = new.id);
+    END
+    """,
+]
+
+SQLITE_REBUILD = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, description, assignee)
+    SELECT t.id, t.title, t.description, u.first_name || ' ' || u.username
+    FROM tasks_task t JOIN users_customuser u ON u.id = t.assigned_to_id
+    """,
+]
+
+SQLITE_DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_assignee",
+]
+
+SQLITE_DROP = SQLITE_DROP_TRIGGERS + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce({table}title, '') || ' ' || coalesce({table}description, ''))"
+
+POSTGRES_ASSIGNEE_DOCUMENT = "to_tsvector('simple', coalesce({table}first_name, '') || ' ' || coalesce({table}username, ''))"
+
+POSTGRES_CREATE = [
+    f"CREATE INDEX IF NOT EXISTS tasks_task_search_idx ON tasks_task USING gin (({POSTGRES_DOCUMENT.format(table='')}))",
+    # Assignee names, like the assignee column of the SQLite FTS table
+    f"CREATE INDEX IF NOT EXISTS users_customuser_search_idx ON users_customuser "
+    f"USING gin (({POSTGRES_ASSIGNEE_DOCUMENT.format(table='')}))",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS tasks_task_search_idx",
+    "DROP INDEX IF EXISTS users_customuser_search_idx",
+]
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def fts_table_exists(connection):
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def create_index(connection):
+    """Create the empty search index (migration 0021)."""
+    if connection.vendor == "sqlite":
+        _execute(connection, SQLITE_CREATE)
+    elif connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_CREATE)
+
+
+def drop_index(connection):
+    if connection.vendor == "sqlite":
+        _execute(connection, SQLITE_DROP)
+    elif connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_DROP)
+
+
+def drop_triggers(connection):
+    if connection.vendor == "sqlite":
+        _execute(connection, SQLITE_DROP_TRIGGERS)
+
+
+def install(connection=default_connection, rebuild=True):
+    """Create the index if missing, (re)create the sync triggers and optionally reindex every task."""
+    create_index(connection)
+    if connection.vendor == "sqlite":
+        _execute(connection, SQLITE_TRIGGERS)
+        if rebuild:
+            _execute(connection, SQLITE_REBUILD)
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query.lower())[:10]
+
+
+def search_tasks(queryset, query):
+    """
+    Filter `queryset` to tasks matching every word of `query` (each word as a
+    prefix), annotated with `search_rank` where lower is a better match.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            # bm25: more negative is more relevant
+            search_rank=RawSQL(
+                f"SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = tasks_task.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    if vendor == "postgresql":
+        document = POSTGRES_DOCUMENT.format(table="tasks_task.")
+        assignee_document = POSTGRES_ASSIGNEE_DOCUMENT.format(table="")
+        # Each word in the task itself or in its assignee's names, as the FTS5 table does
+        word_match = (
+            f"({document} @@ to_tsquery('simple', %s) OR tasks_task.assigned_to_id IN "
+            f"(SELECT id FROM users_customuser WHERE {assignee_document} @@ to_tsquery('simple', %s)))"
+        )
+        prefixes = [f"{term}:*" for term in terms]
+        tsquery = " & ".join(prefixes)
+        return queryset.alias(
+            search_match=RawSQL(
+                " AND ".join([word_match] * len(prefixes)),
+                [prefix for prefix in prefixes for _ in range(2)],
+                output_field=BooleanField(),
+            )
+        ).filter(search_match=True).annotate(
+            # Negated so that, as with bm25, lower is more relevant
+            search_rank=RawSQL(
+                f"-ts_rank({document} || coalesce((SELECT {assignee_document} FROM users_customuser "
+                f"WHERE id = tasks_task.assigned_to_id), ''::tsvector), to_tsquery('simple', %s))",
+                [tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+    # Other backends: unindexed fallback
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(title__icontains=term) | Q(description__icontains=term)
+            | Q(assigned_to__first_name__icontains=term) | Q(assigned_to__username__icontains=term)
+        )
+    return queryset.filter(condition).annotate(
+        search_rank=RawSQL("0", [], output_field=FloatField())
+    )
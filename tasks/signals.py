@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_migrate
+from django.dispatch import receiver
+
+from users.models import Department
+from . import search
+from .cache import invalidate_status_counts, invalidate_task_versions
+from .models import Task
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Task)
+def remember_assignee(sender, instance, **kwargs):
+    # Read from __dict__ so deferred (.only()) loads don't trigger a query
+    instance._loaded_assigned_to_id = instance.__dict__.get("assigned_to_id")
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    # Covers update_task_status, TaskAdmin.save_model and reassignments
+    invalidate_status_counts(instance.assigned_to_id, instance._loaded_assigned_to_id)
+    instance._loaded_assigned_to_id = instance.assigned_to_id
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A department move shifts that user's tasks between the admin department totals;
+    # skip new users (no tasks yet) and partial saves such as last_login on sign-in
+    if created or (update_fields is not None and "department" not in update_fields):
+        return
+    invalidate_status_counts()
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, update_fields=None, **kwargs):
+    # Task lists render the user's name in the header and as "assigned by" in
+    # the cached rows, so those lists get a new ETag
+    if created or (update_fields is not None and not {"first_name", "last_name", "username"} & set(update_fields)):
+        return
+    assignees = Task.objects.filter(assigned_by=instance).values_list("assigned_to_id", flat=True).distinct()
+    invalidate_task_versions(instance.pk, *assignees)
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted(sender, instance, **kwargs):
+    # Its users fall back to no department
+    invalidate_status_counts()
+
+
+@receiver(pre_migrate)
+def drop_search_triggers(sender, using, **kwargs):
+    # The FTS triggers reference tasks_task and users_customuser, which
+    # breaks SQLite's table rebuilds during migrations
+    if sender.name == "tasks":
+        search.drop_triggers(connections[using])
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, plan=None, **kwargs):
+    if sender.name != "tasks":
+        return
+    connection = connections[using]
+    if connection.vendor == "sqlite" and search.fts_table_exists(connection):
+        # Reindex only if migrations actually ran while the triggers were off
+        search.install(connection, rebuild=bool(plan))
@@ -1,3 +1,954 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from users.cache import clear_local
+from users.models import Department
+from users.tests import SHARED_CACHE_SETTINGS
+from .analytics import rollup
+from .cache import get_status_counts, status_counts_key
+from .mail import claim_batch, queue_mail, send_queued_batch
+from .history import Transition, average_time_in_status, record_transitions
+from .models import NotificationLog, OutboundEmail, ReminderRun, Task, TaskRollup, TaskStatusEvent
+from .reminders import enqueue_reminders, send_deadline_reminders, tasks_due
+from .search import search_tasks
+from .transitions import ASSIGNEE, MANAGER, check_transitions, sources
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        # Fails with CommandError if an index backing a hot query is dropped
+        call_command("check_query_plans", stdout=StringIO())
+
+
+class TaskAdminQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Engineering")
+        # Superuser so every task is visible; MANAGER role so the changelist
+        # formset runs the assigned_by.role priority lock on each row
+        cls.admin_user = User.objects.create_superuser(
+            username="boss@example.com", password="pw", dob_id="A-1",
+            role=User.Role.MANAGER, department=cls.department,
+        )
+
+    def create_tasks(self, count):
+        deadline = timezone.localdate() + timedelta(days=3)
+        for i in range(count):
+            assignee = User.objects.create_user(
+                username=f"user{Task.objects.count()}@example.com",
+                dob_id=f"U-{Task.objects.count()}",
+                department=self.department,
+            )
+            Task.objects.create(
+                title=f"Task {i}", description="-", deadline=deadline,
+                assigned_to=assignee, assigned_by=self.admin_user,
+            )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/admin/tasks/task/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self.client.force_login(self.admin_user)
+        self.create_tasks(2)
+        # Warm the session/user cache so both measurements start equal
+        self.changelist_queries()
+        small = self.changelist_queries()
+        self.create_tasks(20)
+        # New tasks drop the cached changelist totals; re-warm them too
+        self.changelist_queries()
+        large = self.changelist_queries()
+        self.assertEqual(small, large)
+
+    @override_settings(**SHARED_CACHE_SETTINGS)
+    def test_status_and_department_pages_skip_count(self):
+        self.client.force_login(self.admin_user)
+        self.create_tasks(3)
+        other = Department.objects.create(name="Finance")
+        Task.objects.filter(pk=Task.objects.first().pk).update(status=Task.Status.COMPLETED)
+        cache.clear()
+        url = f"/admin/tasks/task/?status__exact=PENDING&department={self.department.pk}"
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"]])
+
+        # Writes through the ORM drop the cached totals
+        Task.objects.filter(status=Task.Status.PENDING).first().delete()
+        self.assertEqual(self.client.get(url).context["cl"].result_count, 1)
+        response = self.client.get(f"/admin/tasks/task/?department={other.pk}")
+        self.assertEqual(response.context["cl"].result_count, 0)
+
+    def test_per_process_cache_counts_as_usual(self):
+        # Another worker's writes would never drop a locmem total
+        self.client.force_login(self.admin_user)
+        self.create_tasks(2)
+        self.client.get("/admin/tasks/task/?status__exact=PENDING")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/admin/tasks/task/?status__exact=PENDING")
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertTrue([q for q in ctx.captured_queries if "COUNT(" in q["sql"]])
+
+
+class TaskListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="emp@example.com", password="pw", dob_id="E-1")
+        manager = User.objects.create_user(username="mgr@example.com", password="pw", dob_id="M-1")
+        today = timezone.localdate()
+        Task.objects.bulk_create(
+            Task(
+                title=f"Task {i}", description="-", deadline=today + timedelta(days=i % 7),
+                assigned_to=cls.employee, assigned_by=manager,
+            )
+            for i in range(30)
+        )
+
+    def test_pages_follow_deadline_then_id(self):
+        self.client.force_login(self.employee)
+        expected = list(
+            Task.objects.filter(assigned_to=self.employee).order_by("deadline", "id").values_list("id", flat=True)
+        )
+
+        first = self.client.get("/tasks/PENDING/")
+        first_page = first.context["page"]
+        self.assertTrue(first_page.has_next)
+        self.assertEqual([t.id for t in first_page], expected[:25])
+
+        second = self.client.get("/tasks/PENDING/", {"after": first_page.next_cursor})
+        second_page = second.context["page"]
+        self.assertFalse(second_page.has_next)
+        self.assertEqual([t.id for t in second_page], expected[25:])
+
+        back = self.client.get("/tasks/PENDING/", {"before": second_page.previous_cursor})
+        self.assertEqual([t.id for t in back.context["page"]], expected[:25])
+
+
+class StatusCountsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="emp@example.com", password="pw", dob_id="E-1")
+        cls.task = Task.objects.create(
+            title="Task", description="-", deadline=timezone.localdate(), assigned_to=cls.employee,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_are_cached_and_invalidated_on_save(self):
+        self.assertEqual(get_status_counts(self.employee)[Task.Status.PENDING], 1)
+        with self.assertNumQueries(0):
+            get_status_counts(self.employee)
+
+        self.client.force_login(self.employee)
+        self.client.post("/update_task_status", {"task_id": self.task.id, "status": Task.Status.IN_PROGRESS})
+
+        counts = get_status_counts(self.employee)
+        self.assertEqual(counts[Task.Status.PENDING], 0)
+        self.assertEqual(counts[Task.Status.IN_PROGRESS], 1)
+
+
+    def test_counts_are_dropped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Task.objects.create(title="New", description="-", deadline=timezone.localdate(), assigned_to=self.employee)
+                # Another request refills the counts from the rows it can still see
+                cache.set(status_counts_key(self.employee.pk), {"PENDING": 0})
+        self.assertEqual(get_status_counts(self.employee)["PENDING"], Task.objects.filter(status="PENDING").count())
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(username="boss@example.com", password="pw", dob_id="A-1")
+        cls.employee = User.objects.create_user(username="emp@example.com", email="emp@example.com", dob_id="E-1")
+
+    def test_admin_save_queues_instead_of_sending(self):
+        self.client.force_login(self.admin_user)
+        self.client.post("/admin/tasks/task/add/", {
+            "title": "Write report", "description": "-", "priority": Task.Priority.LOW,
+            "status": Task.Status.PENDING, "deadline": timezone.localdate().isoformat(),
+            "assigned_to": self.employee.pk,
+        })
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.recipients, ["emp@example.com"])
+
+        call_command("send_queued_mail", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.Status.SENT)
+
+    def test_reassigning_back_does_not_notify_twice(self):
+        other = User.objects.create_user(username="other@example.com", email="other@example.com", dob_id="E-2")
+        self.client.force_login(self.admin_user)
+        data = {
+            "title": "Write report", "description": "-", "priority": Task.Priority.LOW,
+            "status": Task.Status.PENDING, "deadline": timezone.localdate().isoformat(),
+        }
+        self.client.post("/admin/tasks/task/add/", {**data, "assigned_to": self.employee.pk})
+        task = Task.objects.get()
+        for assignee in (other, self.employee):
+            self.client.post(f"/admin/tasks/task/{task.pk}/change/", {**data, "assigned_to": assignee.pk})
+
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list("to", flat=True)),
+            ["emp@example.com", "other@example.com"],
+        )
+        self.assertEqual(NotificationLog.objects.filter(kind=NotificationLog.Kind.ASSIGNMENT).count(), 2)
+
+    def test_failures_back_off_then_dead_letter(self):
+        queued = queue_mail("Subject", "Body", ["emp@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            self.assertEqual(send_queued_batch(max_attempts=2), (0, 1, 0))
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, OutboundEmail.Status.QUEUED)
+            self.assertGreater(queued.next_attempt_at, timezone.now())
+
+            # Not due yet, so nothing is picked up
+            self.assertEqual(send_queued_batch(max_attempts=2), (0, 0, 0))
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(send_queued_batch(max_attempts=2), (0, 0, 1))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.Status.DEAD)
+
+    def test_batch_is_claimed_then_sent_outside_a_transaction(self):
+        queued = queue_mail("Subject", "Body", ["emp@example.com"])
+        outer = len(connection.atomic_blocks)
+        seen = []
+
+        def send_messages(messages):
+            # No transaction of our own during SMTP (TestCase's are outside), and
+            # other workers can't pick the message up
+            seen.append((len(connection.atomic_blocks) - outer, claim_batch(10)))
+            return len(messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            self.assertEqual(send_queued_batch(), (1, 0, 0))
+        self.assertEqual(seen, [(0, [])])
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.Status.SENT)
+
+
+class DeadlineReminderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tomorrow = tomorrow = timezone.localdate() + timedelta(days=1)
+        cls.alice = alice = User.objects.create_user(username="alice", email="alice@example.com", dob_id="E-1")
+        cls.bob = bob = User.objects.create_user(username="bob", email="bob@example.com", dob_id="E-2")
+        for title, user, status in [
+            ("A1", alice, Task.Status.PENDING),
+            ("A2", alice, Task.Status.IN_PROGRESS),
+            ("A3", alice, Task.Status.COMPLETED),
+            ("B1", bob, Task.Status.PENDING),
+        ]:
+            Task.objects.create(title=title, description="-", deadline=tomorrow, assigned_to=user, status=status)
+
+    def test_recipients_load_in_one_query(self):
+        with self.assertNumQueries(1):
+            emails = {task.assigned_to.email for task in tasks_due(self.tomorrow)}
+        self.assertEqual(emails, {"alice@example.com", "bob@example.com"})
+
+    def test_one_digest_per_assignee(self):
+        report = send_deadline_reminders()
+        self.assertEqual((report.tasks, report.recipients, report.sent), (3, 2, 2))
+
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertIn("A1", by_recipient["alice@example.com"].body)
+        self.assertIn("A2", by_recipient["alice@example.com"].body)
+        self.assertNotIn("A3", by_recipient["alice@example.com"].body)
+
+        # Running the day again only picks up tasks nobody was reminded about
+        Task.objects.create(
+            title="B2", description="-", deadline=self.tomorrow, assigned_to=self.bob,
+        )
+        send_deadline_reminders()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("B2", mail.outbox[-1].body)
+        self.assertNotIn("B1", mail.outbox[-1].body)
+
+    def test_interrupted_run_resumes_after_checkpoint(self):
+        # Alice was emailed before the job died
+        ReminderRun.objects.create(
+            day=self.tomorrow, status=ReminderRun.Status.RUNNING, last_user_id=self.alice.pk, sent=1,
+        )
+        call_command("send_deadline_reminders", stdout=StringIO())
+        self.assertEqual([message.to for message in mail.outbox], [["bob@example.com"]])
+        run = ReminderRun.objects.get(day=self.tomorrow)
+        self.assertEqual((run.status, run.sent), (ReminderRun.Status.DONE, 2))
+
+    def test_wording_follows_the_run_day(self):
+        send_deadline_reminders()
+        self.assertIn("due tomorrow", mail.outbox[0].subject)
+
+        today = timezone.localdate()
+        Task.objects.create(title="Late", description="-", deadline=today, assigned_to=self.alice)
+        Task.objects.create(title="Later", description="-", deadline=today + timedelta(days=5), assigned_to=self.alice)
+        send_deadline_reminders(today)
+        send_deadline_reminders(today + timedelta(days=5))
+        self.assertIn("due today", mail.outbox[-2].subject)
+        self.assertIn(f"due on {today + timedelta(days=5):%b %d}", mail.outbox[-1].body)
+
+    def test_run_held_by_another_pass_is_left_alone(self):
+        ReminderRun.objects.create(
+            day=self.tomorrow, status=ReminderRun.Status.RUNNING,
+            locked_until=timezone.now() + timedelta(minutes=5),
+        )
+        call_command("send_deadline_reminders", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        # Once the lease runs out the run is taken over
+        ReminderRun.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        call_command("send_deadline_reminders", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIsNone(ReminderRun.objects.get().locked_until)
+
+    def test_ledger_is_written_per_email(self):
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def send_then_die(backend, messages):
+            if mail.outbox:
+                raise KeyboardInterrupt
+            return original(backend, messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", send_then_die):
+            with self.assertRaises(KeyboardInterrupt):
+                send_deadline_reminders()
+        self.assertEqual(NotificationLog.objects.filter(kind=NotificationLog.Kind.REMINDER).count(), 2)
+
+        # The restarted pass only emails Bob
+        ReminderRun.objects.update(locked_until=None)
+        send_deadline_reminders()
+        self.assertEqual([message.to for message in mail.outbox], [["alice@example.com"], ["bob@example.com"]])
+
+    def test_cron_pass_does_not_rescan_a_finished_day(self):
+        send_deadline_reminders()
+        enqueue_reminders(self.tomorrow)
+        self.assertEqual(ReminderRun.objects.get().status, ReminderRun.Status.DONE)
+
+    def test_admin_link_only_queues(self):
+        self.client.force_login(User.objects.create_superuser(username="boss", password="pw", dob_id="A-1"))
+        self.client.get("/admin-action/send-reminders/")
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(ReminderRun.objects.get().status, ReminderRun.Status.QUEUED)
+
+
+class TaskImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        engineering = Department.objects.create(name="Engineering")
+        finance = Department.objects.create(name="Finance")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=engineering, is_staff=True,
+        )
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename__in=["add_task", "view_task"]))
+        cls.ann = User.objects.create_user(username="ann@example.com", email="ann@example.com", dob_id="E-1", department=engineering)
+        User.objects.create_user(username="fin@example.com", email="fin@example.com", dob_id="F-1", department=finance)
+
+    def test_manager_import_is_department_scoped_and_batched(self):
+        self.client.force_login(self.manager)
+        upload = SimpleUploadedFile("tasks.csv", "\n".join([
+            "title,description,priority,deadline,assigned_to",
+            "Audit,-,High,2030-01-01,ann@example.com",
+            "Budget,-,,2030-01-02,E-1",
+            "Payroll,-,Low,2030-01-03,fin@example.com",
+            "Broken,-,Low,tomorrow,E-1",
+        ]).encode())
+        response = self.client.post("/admin/tasks/task/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([line for line, _ in response.context["errors"]], [4, 5])
+
+        tasks = Task.objects.order_by("deadline")
+        self.assertEqual([t.title for t in tasks], ["Audit", "Budget"])
+        self.assertEqual({t.assigned_by for t in tasks}, {self.manager})
+        self.assertEqual(tasks[1].priority, Task.Priority.MEDIUM)
+        self.assertEqual(OutboundEmail.objects.filter(to="ann@example.com").count(), 2)
+
+    def test_assignees_match_case_insensitively(self):
+        User.objects.create_user(
+            username="Bob@Example.com", email="Bob@Example.com", dob_id="DOB-123",
+            department=self.manager.department,
+        )
+        self.client.force_login(self.manager)
+        upload = SimpleUploadedFile("tasks.csv", "\n".join([
+            "title,description,priority,deadline,assigned_to",
+            "Audit,-,High,2030-01-01,DOB-123",
+            "Budget,-,High,2030-01-02,bob@example.com",
+            "Plan,-,High,2030-01-03,ANN@example.com",
+        ]).encode())
+        response = self.client.post("/admin/tasks/task/import/", {"file": upload})
+        self.assertRedirects(response, "/admin/tasks/task/", fetch_redirect_response=False)
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_undecodable_file_is_a_form_error(self):
+        self.client.force_login(self.manager)
+        upload = SimpleUploadedFile("tasks.csv", "title,assigned_to\nCafé,E-1\n".encode("cp1252"))
+        response = self.client.post("/admin/tasks/task/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("not UTF-8", str(response.context["form"].errors["file"]))
+        self.assertFalse(Task.objects.exists())
+
+
+class BulkStatusActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name="Engineering")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=department, is_staff=True,
+        )
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename__in=["change_task", "view_task"]))
+        admin_user = User.objects.create_user(username="adm@example.com", dob_id="A-1", role=User.Role.ADMIN)
+        employee = User.objects.create_user(username="emp@example.com", dob_id="E-1", department=department)
+        deadline = timezone.localdate()
+        cls.tasks = [
+            Task.objects.create(title=f"T{i}", description="-", deadline=deadline, assigned_to=employee,
+                                assigned_by=assigned_by, status=status)
+            for i, (assigned_by, status) in enumerate([
+                (cls.manager, Task.Status.REVIEW),
+                (cls.manager, Task.Status.REVIEW),
+                (cls.manager, Task.Status.PENDING),
+                (admin_user, Task.Status.REVIEW),
+            ])
+        ]
+
+    def test_approve_review_is_one_update_and_respects_admin_lock(self):
+        self.client.force_login(self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post("/admin/tasks/task/", {
+                "action": "approve_review",
+                "_selected_action": [t.pk for t in self.tasks],
+            })
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(Task.objects.order_by("title").values_list("status", flat=True)),
+            [Task.Status.COMPLETED, Task.Status.COMPLETED, Task.Status.PENDING, Task.Status.REVIEW],
+        )
+        # One history row per task actually moved, in a single INSERT
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "tasks_taskstatusevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(TaskStatusEvent.objects.values_list("task_id", "from_status", "to_status")),
+            [(t.pk, TaskStatusEvent.Status.REVIEW, TaskStatusEvent.Status.COMPLETED) for t in self.tasks[:2]],
+        )
+
+
+class TaskSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(username="boss@example.com", password="pw", dob_id="A-1")
+        cls.employee = User.objects.create_user(username="emp@example.com", first_name="Rahim", dob_id="E-1")
+        deadline = timezone.localdate()
+        for title, description in [
+            ("Quarterly budget", "Prepare the budget spreadsheet"),
+            ("Budget review", "Budget budget budget"),
+            ("Server migration", "Move the mail server"),
+        ]:
+            Task.objects.create(title=title, description=description, deadline=deadline, assigned_to=cls.employee)
+
+    def test_prefix_match_ranked_and_kept_in_sync(self):
+        titles = list(search_tasks(Task.objects.all(), "budg").order_by("search_rank").values_list("title", flat=True))
+        self.assertEqual(titles, ["Budget review", "Quarterly budget"])
+
+        Task.objects.filter(title="Server migration").update(title="Budget server migration")
+        self.assertEqual(search_tasks(Task.objects.all(), "budget serv").get().title, "Budget server migration")
+
+        # Assignee name changes reach the index through the users_customuser trigger
+        self.assertEqual(search_tasks(Task.objects.all(), "rahim").count(), 3)
+        self.assertEqual(search_tasks(Task.objects.all(), "budget rahi").count(), 3)
+        User.objects.filter(pk=self.employee.pk).update(first_name="Karim")
+        self.assertEqual(search_tasks(Task.objects.all(), "rahim").count(), 0)
+
+    def test_every_backend_matches_assignee_names(self):
+        # Postgres runs the same assertions as SQLite above; this covers the unindexed fallback
+        with mock.patch.object(connection, "vendor", "mysql"):
+            self.assertEqual(search_tasks(Task.objects.all(), "rahim migr").get().title, "Server migration")
+            self.assertEqual(search_tasks(Task.objects.all(), "karim").count(), 0)
+
+    def test_admin_and_employee_search(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get("/admin/tasks/task/", {"q": "migr"})
+        self.assertEqual([t.title for t in response.context["cl"].result_list], ["Server migration"])
+
+        self.client.force_login(self.employee)
+        response = self.client.get("/tasks/PENDING/", {"q": "budget"})
+        self.assertEqual([t.title for t in response.context["tasks"]], ["Budget review", "Quarterly budget"])
+
+
+class AssigneeAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        engineering = Department.objects.create(name="Engineering")
+        finance = Department.objects.create(name="Finance")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=engineering, is_staff=True,
+        )
+        cls.manager.user_permissions.add(
+            *Permission.objects.filter(codename__in=["add_task", "view_task", "view_customuser"])
+        )
+        for i in range(30):
+            User.objects.create_user(username=f"eng{i}@example.com", first_name=f"Eng {i}",
+                                     dob_id=f"E-{i}", department=engineering)
+            User.objects.create_user(username=f"fin{i}@example.com", first_name=f"Fin {i}",
+                                     dob_id=f"F-{i}", department=finance)
+
+    def test_add_form_does_not_render_every_user(self):
+        self.client.force_login(self.manager)
+        response = self.client.get("/admin/tasks/task/add/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "eng29@example.com")
+        self.assertContains(response, "admin-autocomplete")
+
+    def test_autocomplete_is_department_scoped_and_paginated(self):
+        self.client.force_login(self.manager)
+        params = {"app_label": "tasks", "model_name": "task", "field_name": "assigned_to"}
+        response = self.client.get("/admin/autocomplete/", {**params, "term": "example"})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 20)
+        self.assertTrue(data["pagination"]["more"])
+
+        # Every page together is exactly the manager's department
+        ids = {int(r["id"]) for r in data["results"]}
+        page = 2
+        while data["pagination"]["more"]:
+            data = self.client.get("/admin/autocomplete/", {**params, "term": "example", "page": page}).json()
+            ids |= {int(r["id"]) for r in data["results"]}
+            page += 1
+        self.assertEqual(ids, set(User.objects.filter(department__name="Engineering").values_list("pk", flat=True)))
+
+        response = self.client.get("/admin/autocomplete/", {**params, "term": "fin"})
+        self.assertEqual(response.json()["results"], [])
+
+
+class AssigneeNameFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        engineering = Department.objects.create(name="Engineering")
+        finance = Department.objects.create(name="Finance")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=engineering, is_staff=True,
+        )
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename="view_task"))
+        cls.anna = User.objects.create_user(username="anna@example.com", first_name="Anna", dob_id="E-1",
+                                            department=engineering)
+        User.objects.create_user(username="andy@example.com", first_name="Andy", dob_id="F-1", department=finance)
+        deadline = timezone.localdate()
+        Task.objects.create(title="Audit", description="-", deadline=deadline, assigned_to=cls.anna)
+        Task.objects.create(title="Other", description="-", deadline=deadline, assigned_to=cls.manager)
+
+    def setUp(self):
+        cache.clear()
+        clear_local()
+        self.client.force_login(self.manager)
+
+    def test_names_are_cached_scoped_and_invalidated(self):
+        url = "/admin/tasks/task/assignee-names/"
+        self.assertEqual(self.client.get(url, {"term": "an"}).json()["results"], ["Anna"])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url, {"term": "a"}).json()["results"], ["Anna"])
+        self.assertFalse([q for q in ctx.captured_queries if "DISTINCT" in q["sql"]])
+
+        self.anna.first_name = "Annabel"
+        self.anna.save()
+        self.assertEqual(self.client.get(url, {"term": "an"}).json()["results"], ["Annabel"])
+
+    def test_changelist_filters_by_name_without_listing_names(self):
+        response = self.client.get("/admin/tasks/task/", {"assignee": "Anna"})
+        self.assertEqual([t.title for t in response.context["cl"].result_list], ["Audit"])
+        self.assertNotContains(response, "Andy")
+
+
+class TaskAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        engineering = Department.objects.create(name="Engineering")
+        cls.finance = Department.objects.create(name="Finance")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=engineering, is_staff=True,
+        )
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename="view_task"))
+        cls.ann = User.objects.create_user(username="ann@example.com", first_name="Ann", dob_id="E-1",
+                                           department=engineering)
+        cls.fin = User.objects.create_user(username="fin@example.com", dob_id="F-1", department=cls.finance)
+
+    def add_task(self, assignee, status, updated_days_ago, deadline_in):
+        today = timezone.localdate()
+        task = Task.objects.create(title="T", description="-", deadline=today + timedelta(days=deadline_in),
+                                   assigned_to=assignee, status=status)
+        # status_updated_at is auto_now; backdate it the way time would
+        Task.objects.filter(pk=task.pk).update(status_updated_at=today - timedelta(days=updated_days_ago))
+        if status != Task.Status.PENDING:
+            # The history is what dates completions and time in status
+            changed_at = timezone.now() - timedelta(days=updated_days_ago)
+            from_status = "REVIEW" if status == Task.Status.COMPLETED else "PENDING"
+            TaskStatusEvent.objects.create(
+                task=task, assignee=assignee, department=assignee.department,
+                from_status=TaskStatusEvent.Status[from_status], to_status=TaskStatusEvent.Status[status],
+                entered_at=changed_at, changed_at=changed_at,
+            )
+        return task
+
+    def test_rollup_is_incremental_and_page_reads_only_rollups(self):
+        late = self.add_task(self.ann, Task.Status.COMPLETED, 2, -5)
+        self.add_task(self.ann, Task.Status.COMPLETED, 0, 5)
+        stale_review = self.add_task(self.ann, Task.Status.REVIEW, 4, -1)
+        self.add_task(self.ann, Task.Status.REVIEW, 2, 3)
+        self.add_task(self.fin, Task.Status.PENDING, 0, 3)
+        call_command("rollup_task_stats", stdout=StringIO())
+
+        # Second run the same day only rebuilds today, not the backfill window
+        self.add_task(self.ann, Task.Status.COMPLETED, 0, 1)
+        # Editing a completed task moves status_updated_at, not its completion day
+        late.title = "Renamed"
+        late.save()
+        # ... nor resets how long an open task has been in its status
+        stale_review.title = "Renamed"
+        stale_review.save()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("rollup_task_stats", stdout=StringIO())
+        self.assertTrue(any("tasks_taskstatusevent" in q["sql"] for q in ctx.captured_queries))
+
+        self.client.force_login(self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/admin/tasks/task/analytics/", {"department": self.finance.pk})
+        self.assertFalse([q for q in ctx.captured_queries if '"tasks_task"' in q["sql"]])
+
+        # Managers are pinned to their own department
+        self.assertEqual(response.context["completed_total"], 3)
+        self.assertEqual([row["tasks"] for row in response.context["completed_per_day"]], [1, 2])
+        self.assertEqual([row["late"] for row in response.context["completed_per_day"]], [1, 0])
+        review = next(row for row in response.context["statuses"] if row["status"] == "Review")
+        self.assertEqual((review["tasks"], review["overdue"], review["average_days"]), (2, 1, 3.0))
+        self.assertEqual([row["assignee__first_name"] for row in response.context["load"]], ["Ann"])
+
+
+    def test_completions_roll_up_per_completing_assignee(self):
+        engineering = self.ann.department
+        first = self.add_task(self.ann, Task.Status.REVIEW, 0, 5)
+        second = self.add_task(self.ann, Task.Status.REVIEW, 0, 5)
+        record_transitions([Transition(first.pk, self.ann.pk, engineering.pk, "REVIEW", "COMPLETED")])
+        # Ann moves to Finance and completes another one the same day
+        record_transitions([Transition(second.pk, self.ann.pk, self.finance.pk, "REVIEW", "COMPLETED")])
+        # Reassigning a finished task doesn't move the credit
+        Task.objects.filter(pk=first.pk).update(assigned_to=self.fin)
+
+        rollup()
+        completed = TaskRollup.objects.get(status=Task.Status.COMPLETED)
+        self.assertEqual((completed.assignee, completed.tasks), (self.ann, 2))
+
+
+class TaskStatusHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Engineering")
+        cls.employee = User.objects.create_user(username="emp@example.com", password="pw", dob_id="E-1",
+                                                department=cls.department)
+        cls.task = Task.objects.create(title="Audit", description="-", deadline=timezone.localdate(),
+                                       assigned_to=cls.employee)
+
+    def move(self, status):
+        self.client.post("/update_task_status", {"task_id": self.task.pk, "status": status})
+
+    def test_transitions_are_logged_with_time_in_previous_status(self):
+        self.client.force_login(self.employee)
+        self.move(Task.Status.IN_PROGRESS)
+        self.move(Task.Status.REVIEW)
+        # Rejected transitions and plain edits leave no history
+        self.move(Task.Status.COMPLETED)
+        Task.objects.get(pk=self.task.pk).save()
+
+        first, second = TaskStatusEvent.objects.order_by("changed_at")
+        self.assertEqual((first.from_status, first.to_status),
+                         (TaskStatusEvent.Status.PENDING, TaskStatusEvent.Status.IN_PROGRESS))
+        self.assertEqual(first.department, self.department)
+        self.assertEqual(first.entered_at.date(), self.task.created_at)
+        self.assertEqual(second.entered_at, first.changed_at)
+        self.assertEqual(TaskStatusEvent.objects.count(), 2)
+
+        averages = average_time_in_status(timezone.now() - timedelta(days=1), self.department.pk)
+        self.assertEqual(set(averages), {Task.Status.PENDING, Task.Status.IN_PROGRESS})
+        self.assertEqual(averages[Task.Status.IN_PROGRESS], second.changed_at - first.changed_at)
+
+
+class ConditionalStatusUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="emp@example.com", password="pw", dob_id="E-1")
+        other = User.objects.create_user(username="other@example.com", dob_id="E-2")
+        cls.task = Task.objects.create(title="Audit", description="-", deadline=timezone.localdate(),
+                                       assigned_to=cls.employee)
+        cls.foreign = Task.objects.create(title="Theirs", description="-", deadline=timezone.localdate(),
+                                          assigned_to=other)
+
+    def setUp(self):
+        self.client.force_login(self.employee)
+
+    def post(self, task, status):
+        response = self.client.post("/update_task_status", {"task_id": task.pk, "status": status}, follow=True)
+        return response, [str(m) for m in get_messages(response.wsgi_request)]
+
+    def test_move_is_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post("/update_task_status", {"task_id": self.task.pk, "status": "IN_PROGRESS"})
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn(""""status" = 'PENDING'""", updates[0])
+        # No read of the task row itself
+        self.assertFalse([q for q in ctx.captured_queries if '"tasks_task"."title"' in q["sql"]])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.Status.IN_PROGRESS)
+
+    def test_concurrent_admin_change_is_not_overwritten(self):
+        # A manager blocks the task while the employee's page still shows it as pending
+        Task.objects.filter(pk=self.task.pk).update(status=Task.Status.BLOCKED)
+        _, notes = self.post(self.task, "IN_PROGRESS")
+        self.assertIn("changed to Blocked in the meantime", notes[0])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, Task.Status.BLOCKED)
+        self.assertFalse(TaskStatusEvent.objects.exists())
+
+    def test_disallowed_and_foreign_tasks(self):
+        _, notes = self.post(self.task, "COMPLETED")
+        self.assertEqual(notes, ["Cannot change task from Pending to Completed."])
+        self.assertEqual(self.post(self.foreign, "IN_PROGRESS")[0].status_code, 404)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, Task.Status.PENDING)
+
+
+class TransitionTableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name="Engineering")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=department, is_staff=True,
+        )
+        cls.manager.user_permissions.add(*Permission.objects.filter(codename__in=["change_task", "view_task"]))
+        employee = User.objects.create_user(username="emp@example.com", dob_id="E-1", department=department)
+        cls.tasks = [
+            Task.objects.create(title=f"T{i}", description="-", deadline=timezone.localdate(),
+                                assigned_to=employee, assigned_by=cls.manager, status=status)
+            for i, status in enumerate([Task.Status.PENDING, Task.Status.REVIEW])
+        ]
+
+    def test_table_is_compiled_per_actor(self):
+        self.assertEqual(sources(ASSIGNEE, Task.Status.IN_PROGRESS), {Task.Status.PENDING})
+        self.assertEqual(sources(ASSIGNEE, Task.Status.COMPLETED), frozenset())
+        self.assertEqual(
+            check_transitions(MANAGER, [
+                (1, Task.Status.REVIEW, Task.Status.COMPLETED),
+                (2, Task.Status.PENDING, Task.Status.COMPLETED),
+                (3, Task.Status.BLOCKED, Task.Status.BLOCKED),
+            ]),
+            {2: "Cannot change task from Pending to Completed."},
+        )
+
+    def test_changelist_rows_are_validated_together(self):
+        self.client.force_login(self.manager)
+        data = {
+            "form-TOTAL_FORMS": "2", "form-INITIAL_FORMS": "2", "_save": "Save",
+            "form-0-id": self.tasks[0].pk, "form-0-priority": "MEDIUM", "form-0-status": "COMPLETED",
+            "form-1-id": self.tasks[1].pk, "form-1-priority": "MEDIUM", "form-1-status": "COMPLETED",
+        }
+        response = self.client.post("/admin/tasks/task/?o=1", data)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cannot change task from Pending to Completed.")
+        # The whole formset is rejected, so nothing was saved
+        self.assertEqual(
+            [t.status for t in Task.objects.order_by("title")], [Task.Status.PENDING, Task.Status.REVIEW]
+        )
+
+        data["form-0-status"] = "IN_PROGRESS"
+        self.client.post("/admin/tasks/task/?o=1", data)
+        self.assertEqual(
+            [t.status for t in Task.objects.order_by("title")], [Task.Status.IN_PROGRESS, Task.Status.COMPLETED]
+        )
+        self.assertEqual(TaskStatusEvent.objects.count(), 2)
+
+    def test_change_form_rejects_disallowed_move(self):
+        self.client.force_login(self.manager)
+        task = self.tasks[0]
+        response = self.client.post(f"/admin/tasks/task/{task.pk}/change/", {
+            "title": task.title, "description": "-", "priority": "MEDIUM", "status": "COMPLETED",
+            "deadline": task.deadline.isoformat(), "assigned_to": task.assigned_to_id,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["adminform"].form.errors["status"],
+                         ["Cannot change task from Pending to Completed."])
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+class TaskApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name="Engineering")
+        cls.manager = User.objects.create_user(
+            username="mgr@example.com", password="pw", dob_id="M-1", role=User.Role.MANAGER,
+            department=department, is_staff=True,
+        )
+        admin_user = User.objects.create_user(username="adm@example.com", dob_id="A-1", role=User.Role.ADMIN)
+        cls.employee = User.objects.create_user(username="emp@example.com", dob_id="E-1", department=department)
+        today = timezone.localdate()
+        cls.tasks = [
+            Task.objects.create(title=f"T{i}", description="-", deadline=today + timedelta(days=i),
+                                assigned_to=cls.employee, assigned_by=assigned_by, status=status)
+            for i, (assigned_by, status) in enumerate([
+                (cls.manager, Task.Status.PENDING),
+                (cls.manager, Task.Status.PENDING),
+                (cls.manager, Task.Status.IN_PROGRESS),
+                (admin_user, Task.Status.REVIEW),
+            ])
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def batch(self, changes):
+        return self.client.post("/tasks/api/status/", {"changes": changes}, content_type="application/json").json()
+
+    def test_list_fields_cursor_and_etag(self):
+        self.client.force_login(self.employee)
+        response = self.client.get("/tasks/api/", {"fields": "id,title", "limit": 3})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["results"], [{"id": t.pk, "title": t.title} for t in self.tasks[:3]])
+        page2 = self.client.get("/tasks/api/", {"fields": "id", "limit": 3, "after": data["next"]}).json()
+        self.assertEqual(page2["results"], [{"id": self.tasks[3].pk}])
+
+        # Unchanged: 304 without touching the task table
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get("/tasks/api/", {"fields": "id,title", "limit": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if '"tasks_task"' in q["sql"]])
+
+        # Any change to one of their tasks changes the ETag
+        self.batch([{"id": self.tasks[0].pk, "status": "IN_PROGRESS"}])
+        changed = self.client.get("/tasks/api/", {"fields": "id,title", "limit": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+
+        self.assertEqual(self.client.get("/tasks/api/", {"fields": "secret"}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get("/tasks/api/").status_code, 401)
+
+    def test_batch_update_validates_each_change(self):
+        self.client.force_login(self.employee)
+        t0, t1, t2, t3 = self.tasks
+        results = self.batch([
+            {"id": t0.pk, "status": "IN_PROGRESS", "from": "PENDING"},
+            {"id": t1.pk, "status": "IN_PROGRESS", "from": "BLOCKED"},
+            {"id": t2.pk, "status": "COMPLETED"},
+            {"id": t2.pk, "status": "REVIEW"},
+            {"id": 999, "status": "REVIEW"},
+        ])["results"]
+        self.assertEqual([r["ok"] for r in results], [True, False, False, False, False])
+        self.assertEqual([r.get("error") for r in results[1:]], ["conflict", "not_allowed", "duplicate", "not_found"])
+        self.assertEqual(
+            [t.status for t in Task.objects.order_by("title")],
+            [Task.Status.IN_PROGRESS, Task.Status.PENDING, Task.Status.IN_PROGRESS, Task.Status.REVIEW],
+        )
+        self.assertEqual(TaskStatusEvent.objects.count(), 1)
+
+    def test_manager_team_scope_and_admin_lock(self):
+        self.client.force_login(self.manager)
+        self.assertEqual(self.client.get("/tasks/api/").json()["results"], [])
+        team = self.client.get("/tasks/api/", {"scope": "team", "fields": "id"}).json()["results"]
+        self.assertEqual(len(team), 4)
+
+        results = self.batch([
+            {"id": self.tasks[2].pk, "status": "BLOCKED"},
+            {"id": self.tasks[3].pk, "status": "COMPLETED"},
+        ])["results"]
+        self.assertEqual([r.get("error") for r in results], [None, "locked"])
+        self.assertEqual(Task.objects.get(pk=self.tasks[2].pk).status, Task.Status.BLOCKED)
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+class TaskListConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="emp@example.com", password="pw", dob_id="E-1")
+        cls.task = Task.objects.create(title="Audit", description="-", deadline=timezone.localdate(),
+                                       assigned_to=cls.employee)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.employee)
+
+    def test_unchanged_list_is_304_and_changes_show_up(self):
+        response = self.client.get("/tasks/PENDING/")
+        self.assertContains(response, "Audit")
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+        # A second-resolution Last-Modified could hide a write made in the same second
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(0):
+            again = self.client.get("/tasks/PENDING/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        # Another page of the same user has its own ETag
+        self.assertEqual(self.client.get("/tasks/REVIEW/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Any write to the user's tasks busts both the ETag and the cached rows
+        self.client.post("/update_task_status", {"task_id": self.task.pk, "status": "IN_PROGRESS"})
+        response = self.client.get("/tasks/PENDING/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Audit")
+        self.assertContains(self.client.get("/tasks/IN_PROGRESS/"), "Audit")
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_etag_with_a_per_process_cache(self):
+        # Other workers would never see the invalidation
+        response = self.client.get("/tasks/PENDING/")
+        self.assertContains(response, "Audit")
+        self.assertFalse(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+        # Nor a cached task table
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/tasks/PENDING/")
+        self.assertTrue(any('FROM "tasks_task"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_renaming_the_assigner_busts_the_cached_rows(self):
+        boss = User.objects.create_user(username="boss@example.com", first_name="Old", dob_id="A-1")
+        Task.objects.filter(pk=self.task.pk).update(assigned_by=boss)
+        # .update() skips post_save, so start from a cold cache
+        cache.clear()
+        etag = self.client.get("/tasks/PENDING/")["ETag"]
+
+        boss.first_name = "New"
+        boss.save()
+        response = self.client.get("/tasks/PENDING/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "New")
+
+    def test_new_login_gets_fresh_csrf_tokens(self):
+        etag = self.client.get("/tasks/PENDING/")["ETag"]
+        self.client.logout()
+        self.client.force_login(self.employee)
+        self.assertEqual(self.client.get("/tasks/PENDING/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
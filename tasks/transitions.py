@@ -0,0 +1,95 @@
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_status_counts
+from .history import Transition, record_transitions
+from .models import Task
+
+User = get_user_model()
+
+ASSIGNEE = "assignee"
+MANAGER = "manager"
+
+
+def compile_transitions(table):
+    """{(actor, to_status): frozenset of statuses it may be reached from} for a Task.TRANSITIONS-style table."""
+    allowed = {}
+    for from_status, to_status, actors in table:
+        for actor in actors:
+            allowed.setdefault((actor, to_status), set()).add(from_status)
+    return {key: frozenset(sources) for key, sources in allowed.items()}
+
+
+# Compiled once at import; every status change checks against this
+ALLOWED_TRANSITIONS = compile_transitions(Task.TRANSITIONS)
+
+
+def actor_for(user):
+    if user.is_superuser or user.role in (User.Role.ADMIN, User.Role.MANAGER):
+        return MANAGER
+    return ASSIGNEE
+
+
+def sources(actor, to_status):
+    """Statuses `actor` may move a task from to reach `to_status`."""
+    return ALLOWED_TRANSITIONS.get((actor, to_status), frozenset())
+
+
+def is_allowed(actor, from_status, to_status):
+    return from_status == to_status or from_status in sources(actor, to_status)
+
+
+def transition_error(from_status, to_status):
+    return f"Cannot change task from {Task.Status(from_status).label} to {Task.Status(to_status).label}."
+
+
+def check_transitions(actor, changes):
+    """
+    Validate many status changes at once. `changes` is an iterable of
+    (key, from_status, to_status); returns {key: error message} for the
+    disallowed ones.
+    """
+    return {
+        key: transition_error(from_status, to_status)
+        for key, from_status, to_status in changes
+        if not is_allowed(actor, from_status, to_status)
+    }
+
+
+# moved: the UPDATE matched. status: the task's status afterwards (None if the task isn't theirs).
+# conflict: the move was allowed but the task was no longer in the expected status
+TransitionResult = namedtuple("TransitionResult", ["moved", "status", "conflict"])
+
+
+def move_own_task(user, task_id, to_status, from_status=None):
+    """
+    Move one of `user`'s tasks from `from_status` (the status they saw) to
+    `to_status` with a single conditional UPDATE (WHERE id, assigned_to and
+    status), so a concurrent change from the admin is never overwritten.
+
+    When nothing matched, the current status is read back so the caller can
+    report the conflict.
+    """
+    allowed = sources(ASSIGNEE, to_status)
+    if from_status is None and len(allowed) == 1:
+        # Older forms don't post the status they were rendered with
+        (from_status,) = allowed
+    mine = Task.objects.filter(id=task_id, assigned_to=user)
+
+    if from_status in allowed:
+        with transaction.atomic():
+            moved = mine.filter(status=from_status).update(
+                status=to_status, status_updated_at=timezone.localdate()
+            )
+            if moved:
+                record_transitions([Transition(task_id, user.pk, user.department_id, from_status, to_status)])
+        if moved:
+            # .update() skips post_save, so drop the sidebar counts here
+            invalidate_status_counts(user.pk)
+            return TransitionResult(True, to_status, False)
+
+    current = mine.values_list("status", flat=True).first()
+    return TransitionResult(False, current, from_status in allowed and current is not None)
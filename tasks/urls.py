@@ -1,9 +1,12 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
     path("tasks/", views.task_list_by_status, name="task_list_default"),
+    # JSON API (see tasks/api.py); before the <status> route
+    path("tasks/api/", api.task_list, name="api_task_list"),
+    path("tasks/api/status/", api.update_status, name="api_update_status"),
     path("tasks/<str:status>/", views.task_list_by_status, name="task_list_by_status"),
     path("update_task_status", views.update_task_status, name="update_task_status"),
     path("admin-action/send-reminders/", views.send_deadline_reminders, name="send_deadline_reminders"),
@@ -1,10 +1,42 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Task
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
 from users.models import CustomUser
+import hashlib
+from django.core.cache import cache
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .cache import TASK_VERSION_TIMEOUT, get_status_counts, get_task_version
+from .pagination import KeysetPage
+from .search import search_tasks
+from .transitions import move_own_task
+
+TASK_LIST_PAGE_SIZE = 25
+# Never outlives the version token it is keyed by
+TASK_LIST_FRAGMENT_TIMEOUT = TASK_VERSION_TIMEOUT
+
+# Columns rendered by tasks/task_list.html
+TASK_LIST_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "created_at",
+    "status_updated_at",
+    "deadline",
+    "assigned_by",
+    "assigned_by__username",
+    "assigned_by__first_name",
+    "assigned_by__last_name",
+)
 
 @login_required
 def dashboard(request):
@@ -13,7 +45,28 @@ def dashboard(request):
     
     return redirect("task_list_default")
 
+def task_list_etag(request, status=None):
+    if not request.user.is_authenticated or status not in Task.Status.values:
+        return None
+    version = get_task_version(request.user.pk)
+    if version is None:
+        return None
+    # The page embeds CSRF tokens, so a new CSRF secret (e.g. after logging in again) must miss
+    get_token(request)
+    parts = (
+        request.user.pk,
+        request.user.username,
+        version,
+        request.META.get("CSRF_COOKIE", ""),
+        request.get_full_path(),
+    )
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+# ETag only: a Last-Modified from the token would have one-second resolution
+@condition(etag_func=task_list_etag)
 def task_list_by_status(request, status=None):
     if not status:
         return redirect("task_list_by_status", status=Task.Status.PENDING)
@@ -22,18 +75,53 @@ def task_list_by_status(request, status=None):
         messages.error(request, "Invalid task status.")
         return redirect("task_list_by_status", status=Task.Status.PENDING)
 
-    tasks = Task.objects.filter(
-        assigned_to=request.user,
-        status=status
-    )
+    query = request.GET.get("q", "").strip()
+    # The task table is cached per user, task version, CSRF secret and URL (the ETag);
+    # repeat visits skip the task query and the row rendering
+    etag = task_list_etag(request, status)
+    fragment_key = f"tasks:list_fragment:{etag}"
+    rows = cache.get(fragment_key) if etag else None
+    if rows is None:
+        # One joined query, only the columns the template renders, served by
+        # task_assignee_status_idx in (deadline, id) order
+        tasks = (
+            Task.objects.filter(assigned_to=request.user, status=status)
+            .select_related("assigned_by")
+            .only(*TASK_LIST_FIELDS)
+        )
+        if query:
+            # Ranked full-text matches (prefix per word), best first
+            page = None
+            tasks = search_tasks(tasks, query).order_by("search_rank", "deadline", "id")[:TASK_LIST_PAGE_SIZE]
+        else:
+            tasks = page = KeysetPage(
+                tasks,
+                after=request.GET.get("after"),
+                before=request.GET.get("before"),
+                per_page=TASK_LIST_PAGE_SIZE,
+            )
+        rows = render_to_string(
+            "tasks/task_rows.html",
+            {
+                "tasks": tasks,
+                "page": page,
+                "query": query,
+                "status_label": dict(Task.Status.choices)[status],
+            },
+            request=request,
+        )
+        if etag:
+            cache.set(fragment_key, rows, TASK_LIST_FRAGMENT_TIMEOUT)
 
     return render(
         request,
         "tasks/task_list.html",
         {
-            "tasks": tasks,
+            "rows": mark_safe(rows),
+            "query": query,
             "current_status": status,
             "status_label": dict(Task.Status.choices)[status],
+            "status_counts": get_status_counts(request.user),
         }
     )
 
@@ -42,73 +130,44 @@ def update_task_status(request):
     if request.method != "POST":
         return redirect("dashboard")
 
-    task_id = request.POST.get("task_id")
-    new_status = request.POST.get("status")
+    task_id = request.POST.get("task_id", "")
+    new_status = request.POST.get("status", "")
+    if not task_id.isdigit():
+        raise Http404
 
-    task = get_object_or_404(Task, id=task_id, assigned_to=request.user)
+    # One conditional UPDATE; no read-modify-write of the whole row
+    result = move_own_task(request.user, int(task_id), new_status, request.POST.get("current_status") or None)
+    if result.status is None:
+        raise Http404
 
-    # Enforce status rules
-    if task.status == "PENDING" and new_status == "IN_PROGRESS":
-        task.status = new_status
-    elif task.status == "IN_PROGRESS" and new_status == "REVIEW":
-        task.status = new_status
+    if result.moved:
+        messages.success(request, f"Task updated to {Task.Status(result.status).label}.")
+    elif result.conflict:
+        # Allowed move, but the task was no longer in the status the employee saw
+        messages.error(
+            request,
+            f"This task was changed to {Task.Status(result.status).label} in the meantime; "
+            f"nothing was updated."
+        )
     else:
         messages.error(
             request,
-            f"Cannot change task from {task.get_status_display()} "
+            f"Cannot change task from {Task.Status(result.status).label} "
             f"to {new_status.replace('_', ' ').title()}."
         )
-        return redirect("task_list_by_status", status=task.status)
-
-    task.save()
-    messages.success(
-        request,
-        f"Task '{task.title}' updated to {task.get_status_display()}."
-    )
 
-    return redirect("task_list_by_status", status=task.status)
+    return redirect("task_list_by_status", status=result.status)
 
 
 
 
-from django.core.mail import send_mail
-from django.conf import settings
-from django.utils import timezone
-from datetime import timedelta
 from django.contrib.auth.decorators import user_passes_test
+from .reminders import enqueue_reminders
 
 @login_required
 @user_passes_test(lambda u: u.is_staff)
 def send_deadline_reminders(request):
-    tomorrow = timezone.localdate() + timedelta(days=1)
-    tasks_due_tomorrow = Task.objects.filter(
-        deadline=tomorrow,
-        status__in=[Task.Status.PENDING, Task.Status.IN_PROGRESS]
-    )
-
-    sent_count = 0
-    for task in tasks_due_tomorrow:
-        if task.assigned_to and task.assigned_to.email:
-            subject = f"Reminder: Task '{task.title}' is due tomorrow!"
-            message = (
-                f"Hello {task.assigned_to.first_name or task.assigned_to.username},\n\n"
-                f"This is a reminder that your task '{task.title}' is due tomorrow ({task.deadline}).\n"
-                f"Current Status: {task.get_status_display()}\n\n"
-                f"Please ensure it is completed on time.\n\n"
-                f"Regards,\nDOB Task Manager"
-            )
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [task.assigned_to.email],
-                    fail_silently=True,
-                )
-                sent_count += 1
-            except Exception:
-                pass
-
-    messages.success(request, f"Successfully sent {sent_count} deadline reminder(s).")
+    # Only queue the run; the send_deadline_reminders command does the DB and SMTP work
+    run = enqueue_reminders(requeue=True)
+    messages.success(request, f"Deadline reminders for {run.day} have been queued.")
     return redirect("/admin/tasks/task/?status__exact=PENDING")
-
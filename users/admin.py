@@ -1,6 +1,12 @@
 from django.contrib.auth.models import Group
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .forms import ImportFileForm
+from .importers import import_uploaded_file
 from .models import CustomUser, Department, PrimarySetting
 
 admin.site.unregister(Group)
@@ -10,7 +16,9 @@ class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'first_name', 'role', 'department', 'is_staff', 'is_active',)
     list_editable = ('role',)
     list_filter = ('role', 'department', 'is_staff', 'is_superuser')
-    search_fields = ('username', 'first_name')
+    search_fields = ('username', 'first_name', '=dob_id')
+    # Department picker via autocomplete (DepartmentAdmin.search_fields)
+    autocomplete_fields = ('department',)
     
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
@@ -27,6 +35,51 @@ class CustomUserAdmin(UserAdmin):
         ('Custom Fields', {'fields': ('first_name', 'role', 'department', 'dob_id')}),
     )
 
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="users_customuser_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    # 👇 Bulk onboarding: upload a CSV/JSONL of employees (see users/importers.py)
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        errors = []
+        form = ImportFileForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            try:
+                # Hash inline: no process pool inside a web worker (import_users uses one)
+                report = import_uploaded_file(form.cleaned_data["file"], request.user, workers=0)
+            except ValidationError as e:
+                form.add_error("file", e)
+            else:
+                errors = report.errors
+                self.message_user(
+                    request,
+                    f"Created {report.created} user(s) and {report.departments_created} department(s); "
+                    f"{len(errors)} row(s) skipped.",
+                    messages.WARNING if errors else messages.SUCCESS,
+                )
+                if not errors:
+                    return redirect("admin:users_customuser_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import users",
+            "help_text": "CSV (with a header row) or JSONL with name, email, dob_id, department, role "
+                         "and an optional password. Users without a password must use password reset.",
+            "form": form,
+            "errors": errors,
+        }
+        return TemplateResponse(request, "admin/import_form.html", context)
+
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         if request.user.is_superuser or request.user.role == CustomUser.Role.ADMIN:
@@ -38,10 +91,18 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
     list_display = ('name',)
-    # search_fields = ('name',)
+    # Needed for the department autocomplete on CustomUserAdmin
+    search_fields = ('name',)
 
 @admin.register(PrimarySetting)
 class PrimarySettingAdmin(admin.ModelAdmin):
     list_display = ('id', 'auto_approve',)
     list_editable = ('auto_approve',)
     list_display_links = ('id',)
+
+    # Single-row table: allow creating it once, never deleting it
+    def has_add_permission(self, request):
+        return not PrimarySetting.objects.exists()
+
+    def has_delete_permission(self, request, obj=None):
+        return False
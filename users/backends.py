@@ -0,0 +1,36 @@
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .models import CustomUser
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+def user_cache_key(user_id):
+    return f"users:user:{user_id}"
+
+
+def invalidate_cached_users(*user_ids):
+    cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves the per-request user lookup from the cache.
+
+    Entries are dropped whenever the CustomUser (or its Department) is saved,
+    see users/signals.py, so role, is_active and password changes apply on
+    the next request. That only holds when every worker shares the cache, so
+    settings.py enables this backend only when SHARED_CACHE is set.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = CustomUser._default_manager.select_related("department").get(pk=user_id)
+            except CustomUser.DoesNotExist:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
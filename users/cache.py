@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+from .models import CustomUser, Department, PrimarySetting
+
+# Per-process copies are trusted this long before re-reading the shared cache,
+# which bounds how stale other workers can be after an admin change
+LOCAL_TTL = 30
+SHARED_TIMEOUT = 60 * 60
+
+PRIMARY_SETTING_KEY = "users:primary_setting"
+DEPARTMENT_CHOICES_KEY = "users:department_choices"
+FIRST_NAMES_KEY = "users:first_names"
+
+_local = {}
+
+
+def group_key(name):
+    return f"users:group:{name}"
+
+
+def _cached(key, loader):
+    now = time.monotonic()
+    hit = _local.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, SHARED_TIMEOUT)
+    _local[key] = (now + LOCAL_TTL, value)
+    return value
+
+
+def invalidate(key):
+    _local.pop(key, None)
+    cache.delete(key)
+
+
+def clear_local():
+    _local.clear()
+
+
+def get_primary_setting():
+    """The PrimarySetting row, from process memory or the shared cache when possible."""
+    return _cached(PRIMARY_SETTING_KEY, PrimarySetting.load)
+
+
+def get_group(name):
+    """Group by name, memoized like get_primary_setting(). Raises Group.DoesNotExist."""
+    return _cached(group_key(name), lambda: Group.objects.get(name=name))
+
+
+def get_department_choices():
+    """[(id, name), ...] for admin filters, memoized like get_primary_setting()."""
+    return _cached(DEPARTMENT_CHOICES_KEY, lambda: list(Department.objects.order_by("name").values_list("id", "name")))
+
+
+def _load_first_names():
+    names = {}
+    rows = (
+        CustomUser.objects.exclude(first_name="")
+        .order_by("first_name")
+        .values_list("department_id", "first_name")
+        .distinct()
+    )
+    for department_id, first_name in rows:
+        names.setdefault(department_id, []).append(first_name)
+    return names
+
+
+def get_first_names():
+    """{department_id: sorted distinct first names} for the assignee filter, memoized like get_primary_setting()."""
+    return _cached(FIRST_NAMES_KEY, _load_first_names)
@@ -60,9 +60,11 @@ class CustomUserCreationForm(UserCreationForm):
         self.fields['username'].help_text = None
         self.fields['username'].label = "Email address"
         self.fields['username'].widget.attrs.pop("autofocus", None)
-        self.fields['first_name'].label = "Full Name"       
+        self.fields['first_name'].label = "Full Name"
 
-        
 
-
-                
\ No newline at end of file
+class ImportFileForm(forms.Form):
+    file = forms.FileField(
+        label="CSV or JSONL file",
+        validators=[validators.FileExtensionValidator(["csv", "jsonl", "json"])],
+    )
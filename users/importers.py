@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .cache import DEPARTMENT_CHOICES_KEY, FIRST_NAMES_KEY, get_group, invalidate
+from .models import CustomUser, Department
+
+IMPORT_BATCH_SIZE = 500
+
+ImportReport = namedtuple("ImportReport", ["created", "departments_created", "errors"])
+
+
+def read_rows(stream, fmt=None, name=""):
+    """Yield (line number, row dict) from a CSV or JSONL text stream."""
+    fmt = fmt or ("jsonl" if name.endswith((".jsonl", ".json")) else "csv")
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError:
+                    yield line_no, None
+    else:
+        # Header is line 1
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+
+
+def _init_worker():
+    # Spawned workers need the app registry for the password hashers
+    django.setup()
+
+
+class UserImporter:
+    """
+    Create users in bulk from rows with name, email, dob_id, department, role
+    and an optional password.
+
+    Existing usernames/DOB IDs are loaded once up front and checked in memory,
+    departments are resolved or created per batch with two queries, passwords
+    are hashed across a process pool and users are written with bulk_create.
+
+    With `requested_by` (the admin view) the rows are scoped like
+    visible_users(): admins may create anything, managers only USER accounts
+    in their own department. Without it (import_users) nothing is scoped.
+    """
+
+    def __init__(self, requested_by=None, batch_size=IMPORT_BATCH_SIZE, workers=None):
+        self.batch_size = batch_size
+        self.workers = workers
+        if requested_by is None or requested_by.is_superuser or requested_by.role == CustomUser.Role.ADMIN:
+            self.allowed_roles = self.only_department = None
+        else:
+            self.allowed_roles = {CustomUser.Role.USER}
+            self.only_department = requested_by.department if requested_by.is_manager() else None
+        self.usernames = set()
+        self.dob_ids = set()
+        for username, dob_id in CustomUser.objects.values_list("username", "dob_id"):
+            self.usernames.add(username.lower())
+            self.dob_ids.add(dob_id)
+        self.departments = {}
+        self.roles = {}
+        for role in CustomUser.Role:
+            self.roles[role.value.lower()] = role.value
+            self.roles[role.label.lower()] = role.value
+
+    def clean(self, row):
+        if not isinstance(row, dict):
+            raise ValidationError("Malformed row.")
+        def value(key):
+            return str(row.get(key) or "").strip()
+
+        name = value("name") or value("first_name")
+        email = value("email").lower()
+        dob_id = value("dob_id")
+        department = value("department")
+        role = self.roles.get((value("role") or CustomUser.Role.USER).lower())
+
+        if not (name and email and dob_id and department):
+            raise ValidationError("name, email, dob_id and department are required.")
+        validate_email(email)
+        if role is None:
+            raise ValidationError(f"Unknown role {row.get('role')!r}.")
+        if self.allowed_roles is not None:
+            if role not in self.allowed_roles:
+                raise ValidationError(f"You can't create {CustomUser.Role(role).label} accounts.")
+            if self.only_department is None or department.lower() != self.only_department.name.lower():
+                raise ValidationError("You can only import users into your own department.")
+            department = self.only_department.name
+        # Caught here as a skipped row instead of failing the whole bulk_create
+        for label, field, text in [
+            ("Name", CustomUser._meta.get_field("first_name"), name),
+            ("Email", CustomUser._meta.get_field("email"), email),
+            ("Email", CustomUser._meta.get_field("username"), email),
+            ("DOB ID", CustomUser._meta.get_field("dob_id"), dob_id),
+            ("Department", Department._meta.get_field("name"), department),
+        ]:
+            if len(text) > field.max_length:
+                raise ValidationError(f"{label} {text[:20]!r}... is longer than {field.max_length} characters.")
+        if email in self.usernames:
+            raise ValidationError(f"A user with email {email} already exists.")
+        if dob_id in self.dob_ids:
+            raise ValidationError(f"A user with DOB ID {dob_id} already exists.")
+
+        self.usernames.add(email)
+        self.dob_ids.add(dob_id)
+        return {
+            "first_name": name,
+            "email": email,
+            "dob_id": dob_id,
+            "department": department,
+            "role": role,
+            "password": value("password") or None,
+        }
+
+    def resolve_departments(self, names):
+        """Fill self.departments for `names`, creating missing ones in bulk. Returns how many were created."""
+        missing = set(names) - set(self.departments)
+        if not missing:
+            return 0
+        self.departments.update(Department.objects.in_bulk(missing, field_name="name"))
+        to_create = missing - set(self.departments)
+        if to_create:
+            Department.objects.bulk_create([Department(name=name) for name in to_create], ignore_conflicts=True)
+            self.departments.update(Department.objects.in_bulk(to_create, field_name="name"))
+        return len(to_create)
+
+    def write_batch(self, cleaned, pool):
+        departments_created = self.resolve_departments({row["department"] for row in cleaned})
+        # Blank passwords get an unusable hash; those users go through password reset
+        passwords = [row["password"] for row in cleaned]
+        if pool:
+            hashes = list(pool.map(make_password, passwords, chunksize=16))
+        else:
+            hashes = [make_password(password) for password in passwords]
+
+        users = [
+            CustomUser(
+                username=row["email"],
+                email=row["email"],
+                first_name=row["first_name"],
+                dob_id=row["dob_id"],
+                department=self.departments[row["department"]],
+                role=row["role"],
+                is_staff=row["role"] != CustomUser.Role.USER,
+                is_active=True,
+                password=password_hash,
+            )
+            for row, password_hash in zip(cleaned, hashes)
+        ]
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+            managers = [user for user in users if user.role == CustomUser.Role.MANAGER]
+            if managers:
+                group = get_group("Manager")
+                CustomUser.groups.through.objects.bulk_create(
+                    [CustomUser.groups.through(customuser_id=user.pk, group_id=group.pk) for user in managers]
+                )
+        return len(users), departments_created
+
+    def run(self, rows):
+        created = departments_created = 0
+        errors = []
+        pool = ProcessPoolExecutor(self.workers, initializer=_init_worker) if self.workers != 0 else None
+        try:
+            batch = []
+            for line_no, row in rows:
+                try:
+                    batch.append(self.clean(row))
+                except ValidationError as e:
+                    errors.append((line_no, "; ".join(e.messages)))
+                if len(batch) >= self.batch_size:
+                    counts = self.write_batch(batch, pool)
+                    created += counts[0]
+                    departments_created += counts[1]
+                    batch = []
+            if batch:
+                counts = self.write_batch(batch, pool)
+                created += counts[0]
+                departments_created += counts[1]
+        finally:
+            if pool:
+                pool.shutdown()
+        # bulk_create skips the signals that normally drop these
+        if departments_created:
+            invalidate(DEPARTMENT_CHOICES_KEY)
+        if created:
+            invalidate(FIRST_NAMES_KEY)
+        return ImportReport(created, departments_created, errors)
+
+
+def import_uploaded_file(uploaded, requested_by=None, workers=None):
+    """
+    Run UserImporter over an uploaded (binary) file from the admin. The file is
+    decoded up front, so a non-UTF-8 upload is rejected before anything is written.
+    """
+    try:
+        text = uploaded.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValidationError('The file is not UTF-8 text; save it as "CSV UTF-8" and upload it again.')
+    return UserImporter(requested_by, workers=workers).run(read_rows(io.StringIO(text, newline=""), name=uploaded.name))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+def collapse_to_single_row(apps, schema_editor):
+    # Keep the row user_registration used to read (the first one) as pk=1
+    PrimarySetting = apps.get_model('users', 'PrimarySetting')
+    first = PrimarySetting.objects.order_by('pk').first()
+    if first is None:
+        return
+    auto_approve = first.auto_approve
+    PrimarySetting.objects.all().delete()
+    PrimarySetting.objects.create(pk=1, auto_approve=auto_approve)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_alter_customuser_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_to_single_row, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='primarysetting',
+            constraint=models.CheckConstraint(condition=models.Q(('id', 1)), name='primarysetting_singleton'),
+        ),
+    ]
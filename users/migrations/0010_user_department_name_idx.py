@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0009_primarysetting_singleton'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['department', 'first_name'], name='user_department_name_idx'),
+        ),
+    ]
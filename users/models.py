@@ -18,13 +18,29 @@ class CustomUser(AbstractUser):
     role = models.CharField(max_length=10, choices=Role.choices, default=Role.USER)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True, related_name="users")
     dob_id = models.CharField(max_length=20, unique=True, verbose_name="DOB ID")
-    
+
+    class Meta(AbstractUser.Meta):
+        swappable = "AUTH_USER_MODEL"
+        indexes = [
+            # Department-scoped assignee lookups (managers) ordered/searched by name
+            models.Index(fields=["department", "first_name"], name="user_department_name_idx"),
+        ]
+
     def is_admin(self):
         return self.role == self.Role.ADMIN
 
     def is_manager(self):
         return self.role == self.Role.MANAGER
 
+    def visible_users(self):
+        # Users this account may see and assign tasks to: admins everyone,
+        # managers their own department, everyone else nobody
+        if self.is_superuser or self.role == self.Role.ADMIN:
+            return CustomUser.objects.all()
+        if self.role == self.Role.MANAGER and self.department_id:
+            return CustomUser.objects.filter(department_id=self.department_id)
+        return CustomUser.objects.none()
+
     def __str__(self):
         if self.first_name:
             # return f"{self.username}: {self.first_name}"
@@ -35,4 +51,20 @@ class CustomUser(AbstractUser):
 
 
 class PrimarySetting(models.Model):
+    # Single-row table: always stored as pk=1 (enforced by the check constraint)
+    SINGLETON_PK = 1
+
     auto_approve = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(id=1), name="primarysetting_singleton"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.pk = self.SINGLETON_PK
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def load(cls):
+        return cls.objects.get_or_create(pk=cls.SINGLETON_PK)[0]
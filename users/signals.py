@@ -0,0 +1,37 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_users
+from .cache import DEPARTMENT_CHOICES_KEY, FIRST_NAMES_KEY, PRIMARY_SETTING_KEY, group_key, invalidate
+from .models import CustomUser, Department, PrimarySetting
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    invalidate_cached_users(instance.pk)
+    # The name list only cares about names and departments (not e.g. last_login on sign-in)
+    if update_fields is None or {"first_name", "department"} & set(update_fields):
+        invalidate(FIRST_NAMES_KEY)
+
+
+@receiver(post_save, sender=Department)
+@receiver(pre_delete, sender=Department)
+def department_changed(sender, instance, **kwargs):
+    # Cached users carry their department; renames are rare so drop them all
+    invalidate_cached_users(*instance.users.values_list("pk", flat=True))
+    invalidate(DEPARTMENT_CHOICES_KEY)
+    invalidate(FIRST_NAMES_KEY)
+
+
+@receiver(post_save, sender=PrimarySetting)
+@receiver(post_delete, sender=PrimarySetting)
+def primary_setting_changed(sender, instance, **kwargs):
+    invalidate(PRIMARY_SETTING_KEY)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    invalidate(group_key(instance.name))
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .backends import CachedModelBackend
+from .cache import clear_local, get_department_choices, get_first_names, get_primary_setting
+from .importers import import_uploaded_file
+from .models import CustomUser, Department, PrimarySetting
+
+
+# What settings.py picks when CACHE_URL names a cache shared by all workers
+SHARED_CACHE_SETTINGS = {
+    "SHARED_CACHE": True,
+    "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+    "AUTHENTICATION_BACKENDS": ["users.backends.CachedModelBackend"],
+}
+
+
+@override_settings(**SHARED_CACHE_SETTINGS)
+class CachedUserBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Engineering")
+        cls.user = CustomUser.objects.create_user(
+            username="emp@example.com", password="pw", dob_id="E-1", department=cls.department,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def test_user_is_served_from_cache(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+            self.assertEqual(user.department.name, "Engineering")
+
+    def test_cache_is_dropped_when_user_or_department_is_saved(self):
+        self.backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+
+        self.user.is_active = True
+        self.user.save()
+        self.backend.get_user(self.user.pk)
+        self.department.name = "Platform"
+        self.department.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).department.name, "Platform")
+
+    def test_logged_in_request_skips_user_query(self):
+        self.client.force_login(self.user)
+        self.client.get("/tasks/PENDING/")
+        with self.assertNumQueries(0):
+            # No user query, and the task list is served from its cached fragment
+            self.client.get("/tasks/PENDING/")
+
+
+class RegistrationConfigCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Engineering")
+        Group.objects.create(name="Manager")
+        PrimarySetting.objects.create(auto_approve=False)
+
+    def setUp(self):
+        cache.clear()
+        clear_local()
+
+    def signup(self, n, role=CustomUser.Role.MANAGER):
+        return self.client.post("/signup/", {
+            "first_name": f"User {n}", "dob_id": f"D-{n}", "department": self.department.pk,
+            "role": role, "username": f"user{n}@example.com",
+            "password1": "s3cure-Passw0rd", "password2": "s3cure-Passw0rd",
+        })
+
+    def test_warm_signup_runs_no_configuration_queries(self):
+        self.signup(1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.signup(2)
+        config_queries = [
+            q["sql"] for q in ctx.captured_queries
+            if "users_primarysetting" in q["sql"] or 'FROM "auth_group"' in q["sql"]
+        ]
+        self.assertEqual(config_queries, [])
+        self.assertTrue(CustomUser.objects.get(dob_id="D-2").groups.filter(name="Manager").exists())
+
+    def test_saving_the_setting_invalidates_it(self):
+        self.assertFalse(get_primary_setting().auto_approve)
+        setting = PrimarySetting.load()
+        setting.auto_approve = True
+        setting.save()
+        self.assertTrue(get_primary_setting().auto_approve)
+        self.assertEqual(PrimarySetting.objects.count(), 1)
+
+    def test_signup_writes_the_user_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.signup(1)
+        writes = [
+            q["sql"].split()[0] for q in ctx.captured_queries
+            if q["sql"].startswith(("INSERT", "UPDATE")) and '"users_customuser"' in q["sql"].split("(")[0]
+        ]
+        self.assertEqual(writes, ["INSERT"])
+        user = CustomUser.objects.get(dob_id="D-1")
+        self.assertEqual((user.is_staff, user.is_active), (True, False))
+
+
+class ImportUsersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name="Manager")
+        Department.objects.create(name="Engineering")
+        CustomUser.objects.create_user(username="taken@example.com", dob_id="D-0")
+
+    def setUp(self):
+        cache.clear()
+        clear_local()
+
+    def _import_and_check(self, workers):
+        rows = "\n".join([
+            "name,email,dob_id,department,role,password",
+            "Ann,ann@example.com,D-1,Engineering,User,s3cure-Passw0rd",
+            "Ben,ben@example.com,D-2,Finance,Manager,",
+            "Dup,dup@example.com,D-1,Engineering,User,",
+            "Old,TAKEN@example.com,D-9,Engineering,User,",
+            "Bad,not-an-email,D-3,Engineering,User,",
+        ])
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as f:
+            f.write(rows)
+            f.flush()
+            err = StringIO()
+            call_command("import_users", f.name, workers=workers, stdout=StringIO(), stderr=err)
+
+        self.assertEqual(err.getvalue().count("line "), 3)
+        ann = CustomUser.objects.get(dob_id="D-1")
+        self.assertTrue(ann.check_password("s3cure-Passw0rd"))
+        ben = CustomUser.objects.get(dob_id="D-2")
+        self.assertEqual(ben.department.name, "Finance")
+        self.assertTrue(ben.is_staff)
+        self.assertFalse(ben.has_usable_password())
+        self.assertTrue(ben.groups.filter(name="Manager").exists())
+
+    def test_import_validates_and_bulk_creates(self):
+        self._import_and_check(workers=0)
+
+    def test_import_hashes_in_process_pool(self):
+        self._import_and_check(workers=2)
+
+    def test_admin_import_view(self):
+        self.client.force_login(CustomUser.objects.create_superuser(username="boss", password="pw", dob_id="A-1"))
+        self.assertEqual(self.client.get("/admin/users/customuser/import/").status_code, 200)
+        upload = SimpleUploadedFile(
+            "staff.jsonl",
+            b'{"name": "Cat", "email": "cat@example.com", "dob_id": "D-5", "department": "Engineering"}\n',
+        )
+        response = self.client.post("/admin/users/customuser/import/", {"file": upload})
+        self.assertRedirects(response, "/admin/users/customuser/")
+        self.assertTrue(CustomUser.objects.filter(dob_id="D-5", role=CustomUser.Role.USER).exists())
+
+    def test_import_refreshes_department_choices_and_names(self):
+        get_department_choices()
+        get_first_names()
+        upload = SimpleUploadedFile(
+            "staff.jsonl",
+            b'{"name": "Cat", "email": "cat@example.com", "dob_id": "D-5", "department": "Legal"}\n',
+        )
+        import_uploaded_file(upload, workers=0)
+        self.assertIn("Legal", [name for _, name in get_department_choices()])
+        legal = Department.objects.get(name="Legal")
+        self.assertEqual(get_first_names()[legal.pk], ["Cat"])
+
+    def test_manager_import_is_scoped_to_users_in_their_department(self):
+        manager = CustomUser.objects.create_user(
+            username="mgr@example.com", dob_id="M-1", role=CustomUser.Role.MANAGER,
+            department=Department.objects.get(name="Engineering"), is_staff=True,
+        )
+        rows = "\n".join([
+            "name,email,dob_id,department,role",
+            "Ann,ann@example.com,D-1,engineering,User",
+            "Boss,boss@example.com,D-2,Engineering,Admin",
+            "Fin,fin@example.com,D-3,Finance,User",
+            f"{'x' * 200},long@example.com,D-4,Engineering,User",
+        ])
+        report = import_uploaded_file(SimpleUploadedFile("staff.csv", rows.encode()), manager, workers=0)
+
+        self.assertEqual((report.created, report.departments_created), (1, 0))
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 5])
+        self.assertEqual(CustomUser.objects.get(dob_id="D-1").department.name, "Engineering")
+        self.assertFalse(Department.objects.filter(name="Finance").exists())
+
+    def test_admin_import_rejects_non_utf8(self):
+        self.client.force_login(CustomUser.objects.create_superuser(username="boss", password="pw", dob_id="A-1"))
+        upload = SimpleUploadedFile(
+            "staff.csv", "name,email,dob_id,department\nRené,rene@example.com,D-6,Engineering\n".encode("cp1252"),
+        )
+        response = self.client.post("/admin/users/customuser/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("not UTF-8", str(response.context["form"].errors["file"]))
+        self.assertFalse(CustomUser.objects.filter(dob_id="D-6").exists())
@@ -5,16 +5,17 @@ from django.contrib.auth.decorators import login_required
 from django.template.loader import render_to_string
 from django.core.mail import EmailMessage
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.urls import reverse
-from django.contrib.auth.models import Group
 import random
 from django.contrib.sites.shortcuts import get_current_site
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from .tokens import account_activation_token
 from django.contrib.auth import get_user_model
-from .models import CustomUser, PrimarySetting
+from .cache import get_group, get_primary_setting
+from .models import CustomUser
 from .forms import CustomUserCreationForm
 from .forms import UserLoginForm
 
@@ -43,23 +44,21 @@ def user_registration(request):
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST, request.FILES)
         if form.is_valid():
+            # Work out the final account state first so the user is written once
             user = form.save(commit=False)
-            user.is_active = False
-            email = form.cleaned_data.get("username")
-            user.email = email
-            user.save()
-            
-            # print(f"User {user.email} created with role {user.role}")
-            
+            user.email = form.cleaned_data.get("username")
+            user.is_active = get_primary_setting().auto_approve
+            manager_group = None
             if user.role == CustomUser.Role.MANAGER:
-                user.groups.add(Group.objects.get(name="Manager"))
+                manager_group = get_group("Manager")
                 user.is_staff = True
-                user.save()
 
-            primary_setting = PrimarySetting.objects.first()
-            if primary_setting and primary_setting.auto_approve:
-                user.is_active = True
+            with transaction.atomic():
                 user.save()
+                if manager_group:
+                    user.groups.add(manager_group)
+
+            if user.is_active:
                 login(request, user)
                 messages.success(request, "You are now logged in.")
                 return redirect("dashboard")